@@ -37,8 +37,9 @@ class LoopAgent(BaseAgent):
         self.can_delegate = can_delegate
         self.tools = {}
         self.output_parser = OutputParser()
-        self.tool_executor = ToolExecutor()
         self._initialize_tools()
+        # Share the agent's tools instead of building a second, unused set
+        self.tool_executor = ToolExecutor(self.tools)
     
     def _initialize_tools(self):
         """Initialize available tools based on agent capabilities"""
@@ -239,7 +240,7 @@ class LoopAgent(BaseAgent):
             return None
         
         # Update tool executor with current tools
-        self.tool_executor.tools = self.tools
+        self.tool_executor.set_tools(self.tools)
         
         # Execute tools
         return await self.tool_executor.execute_tool_actions(tool_actions, context)
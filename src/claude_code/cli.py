@@ -4,24 +4,29 @@ Command-line interface for Claude-Code-Python
 
 import asyncio
 import argparse
+import functools
 import sys
-from typing import Optional
-from .core.claude_code_system import ClaudeCodeSystem, ClaudeCodeConfig
+from typing import Optional, TYPE_CHECKING
 from .utils.logger import get_logger, log_function_call, log_function_result, log_error
 
+if TYPE_CHECKING:
+    from .core.claude_code_system import ClaudeCodeSystem, ClaudeCodeConfig
+
 
 class ClaudeCodeCLI:
     """Command-line interface for Claude-Code-Python"""
     
     def __init__(self):
-        self.system: Optional[ClaudeCodeSystem] = None
+        self.system: Optional["ClaudeCodeSystem"] = None
         self.logger = get_logger("claude_code.cli")
     
-    async def initialize(self, config: Optional[ClaudeCodeConfig] = None):
+    async def initialize(self, config: Optional["ClaudeCodeConfig"] = None):
         """Initialize the system"""
         log_function_call(self.logger, "ClaudeCodeCLI.initialize", config=config)
         
         try:
+            from .core.claude_code_system import ClaudeCodeSystem
+            
             self.logger.info("Initializing Claude Code system")
             self.system = ClaudeCodeSystem(config)
             await self.system.initialize()
@@ -83,7 +88,7 @@ class ClaudeCodeCLI:
                     # Process the request
                     print("🤔 Thinking...")
                     self.logger.info(f"Processing user request: {user_input[:50]}...")
-                    response = await self.system.process_request(user_input)
+                    response = await self.system.process_request(user_input, include_context=False)
                     
                     if "error" in response:
                         self.logger.error(f"Request processing failed: {response['error']}")
@@ -114,7 +119,7 @@ class ClaudeCodeCLI:
     async def run_single(self, request: str):
         """Run single request mode"""
         print(f"Processing request: {request}")
-        response = await self.system.process_request(request)
+        response = await self.system.process_request(request, include_context=False)
         
         if "error" in response:
             print(f"Error: {response['error']}")
@@ -163,14 +168,22 @@ You can also ask questions or give instructions directly!
             print("  Project: None")
 
 
-async def main():
-    """Main entry point"""
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the CLI argument parser (cached across repeated ``main`` calls)"""
     parser = argparse.ArgumentParser(description="Claude-Code-Python CLI")
     parser.add_argument("--request", "-r", help="Single request to process")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
     parser.add_argument("--model", default="moonshotai/kimi-k2-0905", help="Default model provider")
+    return parser
+
+
+async def main():
+    """Main entry point"""
+    # Parse first so that --help exits before the system modules are imported
+    args = _build_parser().parse_args()
     
-    args = parser.parse_args()
+    from .core.claude_code_system import ClaudeCodeConfig
     
     # Create configuration
     config = ClaudeCodeConfig(
@@ -2,11 +2,57 @@
 Agent Registry and Task Router - Manages sub-agents and routes tasks
 """
 
+import re
 from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
 from ..agents.base_agent import BaseAgent
 
 
+# Keyword substrings that imply each capability, checked in this order
+_CAPABILITY_KEYWORDS = (
+    # Code-related capabilities
+    ('code_generation', ('code', 'program', 'function', 'class', 'method')),
+    ('debugging', ('debug', 'error', 'fix', 'bug')),
+    ('testing', ('test', 'testing', 'unit test')),
+    ('documentation', ('document', 'doc', 'readme', 'comment')),
+    # File operations
+    ('file_operations', ('file', 'read', 'write', 'create', 'edit')),
+    # Web operations
+    ('web_search', ('search', 'web', 'url', 'fetch')),
+    # Task management
+    ('task_management', ('task', 'todo', 'plan', 'organize')),
+    # Configuration
+    ('configuration', ('config', 'setup', 'configure', 'settings')),
+)
+
+# One compiled alternation per capability: a single C-level scan replaces a
+# Python loop of substring checks. Capabilities keep separate patterns because
+# keywords overlap across them ('readme' also contains 'read').
+_CAPABILITY_PATTERNS = tuple(
+    (capability, re.compile('|'.join(re.escape(keyword) for keyword in keywords)))
+    for capability, keywords in _CAPABILITY_KEYWORDS
+)
+
+
+@lru_cache(maxsize=256)
+def _capabilities_for(request_lower: str) -> Tuple[str, ...]:
+    """Capabilities implied by a lowercased request (memoized for repeated prompts)"""
+    capabilities = tuple(
+        capability for capability, pattern in _CAPABILITY_PATTERNS
+        if pattern.search(request_lower)
+    )
+    # If no specific capabilities detected, use general purpose
+    return capabilities or ('general_purpose',)
+
+
+@lru_cache(maxsize=256)
+def _selection_reasoning(agent_name: str, capabilities: Tuple[str, ...]) -> str:
+    """Build (and memoize) the routing reasoning for an agent/capability pair"""
+    return f"Selected {agent_name} based on capabilities: {', '.join(capabilities)}"
+
+
 @dataclass
 class AgentInfo:
     """Information about a registered agent"""
@@ -23,6 +69,10 @@ class AgentRegistry:
     def __init__(self):
         self.agents: Dict[str, AgentInfo] = {}
         self.capability_index: Dict[str, List[str]] = {}  # capability -> agent_names
+        # capability -> agents sorted by priority, rebuilt after registry changes
+        self._ranked_by_capability: Dict[str, Tuple[BaseAgent, ...]] = {}
+        # Flat tuple of registered agents, rebuilt after registry changes
+        self._agent_list: Optional[Tuple[BaseAgent, ...]] = None
     
     def register_agent(self, agent: BaseAgent, priority: int = 0):
         """
@@ -41,6 +91,8 @@ class AgentRegistry:
         )
         
         self.agents[agent.name] = agent_info
+        self._ranked_by_capability.clear()
+        self._agent_list = None
         
         # Update capability index
         for capability in agent.capabilities:
@@ -48,6 +100,34 @@ class AgentRegistry:
                 self.capability_index[capability] = []
             self.capability_index[capability].append(agent.name)
     
+    def register_many(self, agents_with_priority: List[Tuple[BaseAgent, int]]):
+        """
+        Register several agents at once
+        
+        The capability index is extended once per capability instead of once
+        per agent/capability pair.
+        
+        Args:
+            agents_with_priority: List of (agent, priority) tuples
+        """
+        new_capabilities: Dict[str, List[str]] = defaultdict(list)
+        self._ranked_by_capability.clear()
+        self._agent_list = None
+        
+        for agent, priority in agents_with_priority:
+            self.agents[agent.name] = AgentInfo(
+                name=agent.name,
+                agent=agent,
+                capabilities=agent.capabilities,
+                description=agent.description,
+                priority=priority
+            )
+            for capability in agent.capabilities:
+                new_capabilities[capability].append(agent.name)
+        
+        for capability, agent_names in new_capabilities.items():
+            self.capability_index.setdefault(capability, []).extend(agent_names)
+    
     def unregister_agent(self, agent_name: str) -> bool:
         """
         Unregister an agent from the registry
@@ -72,6 +152,8 @@ class AgentRegistry:
                     del self.capability_index[capability]
         
         del self.agents[agent_name]
+        self._ranked_by_capability.clear()
+        self._agent_list = None
         return True
     
     def get_agent(self, agent_name: str) -> Optional[BaseAgent]:
@@ -98,24 +180,31 @@ class AgentRegistry:
         Returns:
             List of agents with the capability, sorted by priority
         """
-        if capability not in self.capability_index:
-            return []
-        
-        agent_names = self.capability_index[capability]
-        agents = []
-        
-        for agent_name in agent_names:
-            if agent_name in self.agents:
-                agents.append(self.agents[agent_name])
-        
-        # Sort by priority (higher priority first)
-        agents.sort(key=lambda x: x.priority, reverse=True)
+        ranked = self._ranked_by_capability.get(capability)
+        if ranked is None:
+            agents = [
+                self.agents[agent_name]
+                for agent_name in self.capability_index.get(capability, ())
+                if agent_name in self.agents
+            ]
+            
+            # Sort by priority (higher priority first)
+            agents.sort(key=lambda x: x.priority, reverse=True)
+            
+            ranked = tuple(agent.agent for agent in agents)
+            self._ranked_by_capability[capability] = ranked
         
-        return [agent.agent for agent in agents]
+        return list(ranked)
+    
+    def iter_agents(self) -> Tuple[BaseAgent, ...]:
+        """Get all registered agents as a cached tuple (do not hold it across registrations)"""
+        if self._agent_list is None:
+            self._agent_list = tuple(agent_info.agent for agent_info in self.agents.values())
+        return self._agent_list
     
     def get_all_agents(self) -> List[BaseAgent]:
         """Get all registered agents"""
-        return [agent_info.agent for agent_info in self.agents.values()]
+        return list(self.iter_agents())
     
     def get_agent_names(self) -> List[str]:
         """Get names of all registered agents"""
@@ -188,7 +277,7 @@ class TaskRouter:
         agent = self.find_best_agent(request, context, required_capabilities)
         
         if agent:
-            reasoning = f"Selected {agent.name} based on capabilities: {', '.join(required_capabilities)}"
+            reasoning = _selection_reasoning(agent.name, tuple(required_capabilities))
             return agent, reasoning
         else:
             # Fallback to general purpose agent if available
@@ -211,43 +300,7 @@ class TaskRouter:
         Returns:
             List of required capabilities
         """
-        capabilities = []
-        request_lower = request.lower()
-        
-        # Code-related capabilities
-        if any(keyword in request_lower for keyword in ['code', 'program', 'function', 'class', 'method']):
-            capabilities.append('code_generation')
-        
-        if any(keyword in request_lower for keyword in ['debug', 'error', 'fix', 'bug']):
-            capabilities.append('debugging')
-        
-        if any(keyword in request_lower for keyword in ['test', 'testing', 'unit test']):
-            capabilities.append('testing')
-        
-        if any(keyword in request_lower for keyword in ['document', 'doc', 'readme', 'comment']):
-            capabilities.append('documentation')
-        
-        # File operations
-        if any(keyword in request_lower for keyword in ['file', 'read', 'write', 'create', 'edit']):
-            capabilities.append('file_operations')
-        
-        # Web operations
-        if any(keyword in request_lower for keyword in ['search', 'web', 'url', 'fetch']):
-            capabilities.append('web_search')
-        
-        # Task management
-        if any(keyword in request_lower for keyword in ['task', 'todo', 'plan', 'organize']):
-            capabilities.append('task_management')
-        
-        # Configuration
-        if any(keyword in request_lower for keyword in ['config', 'setup', 'configure', 'settings']):
-            capabilities.append('configuration')
-        
-        # If no specific capabilities detected, use general purpose
-        if not capabilities:
-            capabilities.append('general_purpose')
-        
-        return capabilities
+        return list(_capabilities_for(request.lower()))
     
     def get_available_capabilities(self) -> List[str]:
         """Get all available capabilities across all agents"""
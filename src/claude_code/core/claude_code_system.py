@@ -3,7 +3,11 @@ Claude Code System - New simplified architecture based on official implementatio
 """
 
 import asyncio
-from typing import Dict, Any, Optional, List
+import logging
+import sys
+import traceback
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
 import time
 
@@ -12,15 +16,24 @@ from ..agents.general_purpose_agent import GeneralPurposeAgent
 from ..agents.statusline_setup_agent import StatuslineSetupAgent
 from ..agents.output_style_setup_agent import OutputStyleSetupAgent
 from ..models.model_manager import ModelManager
+from ..models.openrouter_provider import OpenRouterProvider
+from ..models.mock_provider import MockProvider
+from .context_manager import ContextManager
 from .workflow_pipeline import WorkflowPipeline
 from ..utils.logger import get_logger, log_function_call, log_function_result, log_error, log_performance
 
 
-@dataclass
+@dataclass(slots=True)
 class ClaudeCodeConfig:
     """Configuration for Claude-Code-Python"""
     model: str = "moonshotai/kimi-k2-0905"
     debug_mode: bool = False
+    # Max number of successful responses reused for identical requests in an
+    # identical conversation (0 disables)
+    response_cache_size: int = 0
+    # Install asyncio.eager_task_factory on the running loop (Python 3.12+)
+    # when no other task factory is set
+    eager_tasks: bool = False
 
 
 class ClaudeCodeSystem:
@@ -31,8 +44,10 @@ class ClaudeCodeSystem:
     def __init__(self, config: Optional[ClaudeCodeConfig] = None):
         self.config = config or ClaudeCodeConfig()
         self.logger = get_logger("claude_code.system")
+        self._exact_cache: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
         
-        log_function_call(self.logger, "ClaudeCodeSystem.__init__", config=config)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            log_function_call(self.logger, "ClaudeCodeSystem.__init__", config=config)
         
         try:
             # Initialize model manager
@@ -56,9 +71,9 @@ class ClaudeCodeSystem:
             }
             
             # Register sub-agents with the workflow pipeline
-            for name, agent in self.sub_agents.items():
-                self.logger.debug(f"Registering sub-agent: {name}")
-                self.workflow_pipeline.register_sub_agent(agent)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Registering sub-agents: %s", list(self.sub_agents))
+            self.workflow_pipeline.register_sub_agents(self.sub_agents)
             
             # Set sub-agents for lead agent (for backward compatibility)
             self.lead_agent.set_sub_agents(self.sub_agents)
@@ -71,15 +86,29 @@ class ClaudeCodeSystem:
             raise
     
     async def initialize(self):
-        """Initialize the system with model providers"""
-        log_function_call(self.logger, "ClaudeCodeSystem.initialize")
-        start_time = time.time()
+        """
+        Initialize the system with model providers
+        
+        With ``config.eager_tasks`` set on Python 3.12+, the running loop is
+        switched to ``asyncio.eager_task_factory`` (CPython gh-104144) unless
+        a task factory is already installed, so tasks whose coroutine finishes
+        without suspending (cached lookups, context reads) complete
+        synchronously instead of taking a trip through the loop's run queue.
+        The loop belongs to the caller, so this is opt-in.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            log_function_call(self.logger, "ClaudeCodeSystem.initialize")
+        info_enabled = self.logger.isEnabledFor(logging.INFO)
+        start_time = time.perf_counter() if info_enabled else 0.0
         
         try:
+            if self.config.eager_tasks and sys.version_info >= (3, 12):
+                loop = asyncio.get_running_loop()
+                if loop.get_task_factory() is None:
+                    loop.set_task_factory(asyncio.eager_task_factory)
+            
             # Initialize model providers
             self.logger.info("Loading model providers")
-            from ..models.openrouter_provider import OpenRouterProvider
-            from ..models.mock_provider import MockProvider
             
             # Register OpenRouter as primary provider           
             self.logger.info("Registering OpenRouter provider")
@@ -99,97 +128,185 @@ class ClaudeCodeSystem:
             
             # Show provider status
             available_providers = self.model_manager.get_available_providers()
-            self.logger.info(f"Available providers: {available_providers}")
+            self.logger.info("Available providers: %s", available_providers)
             
-            if self.config.debug_mode:
+            if self.config.debug_mode and self.logger.isEnabledFor(logging.DEBUG):
                 self.logger.debug("Provider status details:")
                 for provider_name in self.model_manager.providers.keys():
                     provider_info = self.model_manager.get_provider_info(provider_name)
                     status = "Available" if provider_info['available'] else "Unavailable"
-                    self.logger.debug(f"  • {provider_name}: {status}")
+                    self.logger.debug("  • %s: %s", provider_name, status)
             
             if not available_providers:
                 self.logger.warning("No model providers are available. Please check your API keys.")
                 self.logger.warning("Set OPENROUTER_API_KEY for OpenRouter provider.")
                 self.logger.warning("Using mock provider for testing...")
             
-            duration = time.time() - start_time
-            log_performance(self.logger, "ClaudeCodeSystem.initialize", duration, 
-                          providers_registered=len(self.model_manager.providers),
-                          available_providers=len(available_providers))
+            if info_enabled:
+                duration = time.perf_counter() - start_time
+                log_performance(self.logger, "ClaudeCodeSystem.initialize", duration, 
+                              providers_registered=len(self.model_manager.providers),
+                              available_providers=len(available_providers))
             log_function_result(self.logger, "ClaudeCodeSystem.initialize", "Success", True)
             
         except Exception as e:
             log_error(self.logger, e, "ClaudeCodeSystem.initialize")
             raise
     
-    async def process_request(self, request: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def process_request(self, request: str, context: Optional[Dict[str, Any]] = None,
+                              include_context: bool = True) -> Dict[str, Any]:
         """
         Process a user request through the workflow pipeline
         
         Args:
             request: User's request/query
             context: Optional context information
+            include_context: Whether to attach the full conversation context to
+                the response (skip it when the caller only needs the reply)
             
         Returns:
             Response from the system
         """
-        log_function_call(self.logger, "ClaudeCodeSystem.process_request", 
-                         request=request[:100] + "..." if len(request) > 100 else request,
-                         context_keys=list(context.keys()) if context else None)
-        start_time = time.time()
+        return await self._process_request(request, context, include_context,
+                                           self.workflow_pipeline.context_manager)
+    
+    async def _process_request(self, request: str, context: Optional[Dict[str, Any]],
+                               include_context: bool, context_manager: ContextManager) -> Dict[str, Any]:
+        """Process a request, recording the exchange in the given conversation"""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            log_function_call(self.logger, "ClaudeCodeSystem.process_request", 
+                             request=request[:100] + "..." if len(request) > 100 else request,
+                             context_keys=list(context.keys()) if context else None)
+        info_enabled = self.logger.isEnabledFor(logging.INFO)
+        start_time = time.perf_counter() if info_enabled else 0.0
+        
+        cache_key = None
+        if self.config.response_cache_size > 0 and not context:
+            # Follow-ups like "continue" or "yes" only repeat an answer when
+            # the conversation leading up to them is the same too
+            cache_key = (request.strip().lower(), self._history_fingerprint(context_manager))
+            cached = self._exact_cache.get(cache_key)
+            if cached is not None:
+                self._exact_cache.move_to_end(cache_key)
+                self.logger.info("Serving cached response for repeated request")
+                # Record the exchange as if the workflow had run
+                context_manager.add_message("user", request)
+                context_manager.add_message("assistant", cached["response"])
+                response = dict(cached)
+                if include_context:
+                    response["context"] = context_manager.get_context()
+                return response
         
         try:
             # Process with workflow pipeline
             self.logger.info("Processing request through workflow pipeline")
-            result = await self.workflow_pipeline.process_request(request, context)
+            result = await self.workflow_pipeline.process_request(request, context,
+                                                                  context_manager=context_manager)
             
-            duration = time.time() - start_time
-            log_performance(self.logger, "ClaudeCodeSystem.process_request", duration,
-                          success=result.success, agent_used=result.agent_used)
+            if info_enabled:
+                duration = time.perf_counter() - start_time
+                log_performance(self.logger, "ClaudeCodeSystem.process_request", duration,
+                              success=result.success, agent_used=result.agent_used)
             
             if result.success:
-                self.logger.info(f"Request processed successfully by {result.agent_used}")
+                self.logger.info("Request processed successfully by %s", result.agent_used)
                 response = {
                     "response": result.content,
-                    "context": self.workflow_pipeline.get_context(),
                     "agent_used": result.agent_used,
-                    "tool_results": [tr.__dict__ for tr in result.tool_results]
+                    "tool_results": [tr.to_response_dict() for tr in result.tool_results]
                 }
+                if cache_key is not None:
+                    self._store_cached_response(cache_key, response)
+                if include_context:
+                    response["context"] = context_manager.get_context()
                 log_function_result(self.logger, "ClaudeCodeSystem.process_request", "Success", True)
                 return response
             else:
-                self.logger.warning(f"Request processing failed: {result.error}")
+                self.logger.warning("Request processing failed: %s", result.error)
                 response = {
                     "error": result.error,
-                    "response": result.content,
-                    "context": self.workflow_pipeline.get_context()
+                    "response": result.content
                 }
+                if include_context:
+                    response["context"] = context_manager.get_context()
                 log_function_result(self.logger, "ClaudeCodeSystem.process_request", "Failed", False)
                 return response
             
         except Exception as e:
             log_error(self.logger, e, "ClaudeCodeSystem.process_request")
-            import traceback
             error_msg = f"Error processing request: {str(e)}"
             if self.config.debug_mode:
-                error_msg += f"\nTraceback: {traceback.format_exc()}"
-                self.logger.debug(f"Full traceback: {traceback.format_exc()}")
+                tb = traceback.format_exc()
+                error_msg += f"\nTraceback: {tb}"
+                self.logger.debug("Full traceback: %s", tb)
             
             response = {
                 "error": error_msg,
-                "response": "I encountered an error while processing your request. Please try again.",
-                "context": self.workflow_pipeline.get_context()
+                "response": "I encountered an error while processing your request. Please try again."
             }
+            if include_context:
+                response["context"] = context_manager.get_context()
             log_function_result(self.logger, "ClaudeCodeSystem.process_request", "Exception", False)
             return response
     
+    async def process_requests(self, requests: List[str], context: Optional[Dict[str, Any]] = None,
+                               max_concurrency: int = 16,
+                               include_context: bool = False) -> List[Dict[str, Any]]:
+        """
+        Process several requests concurrently
+        
+        Each request runs on its own branch of the conversation as it was when
+        the batch started, so none sees the others; the exchanges are then
+        added to the conversation in request order.
+        
+        Args:
+            requests: User requests to process
+            context: Optional context information applied to every request
+            max_concurrency: Maximum number of requests in flight at once
+            include_context: Whether to attach the conversation context to
+                each response
+        
+        Returns:
+            Responses in the same order as the requests
+        """
+        context_manager = self.workflow_pipeline.context_manager
+        if context:
+            for key, value in context.items():
+                context_manager.set_session_data(key, value)
+        branches = [context_manager.fork() for _ in requests]
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _process_one(request: str, branch: ContextManager) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._process_request(request, context, include_context, branch)
+        
+        responses = await asyncio.gather(*map(_process_one, requests, branches))
+        for branch in branches:
+            context_manager.merge(branch)
+        return list(responses)
+    
+    @staticmethod
+    def _history_fingerprint(context_manager: ContextManager) -> int:
+        """Hash of the conversation so far, part of the response cache key"""
+        return hash(tuple(
+            (message.role, message.content)
+            for message in context_manager.messages
+        ))
+    
+    def _store_cached_response(self, key: Tuple[str, int], response: Dict[str, Any]):
+        """Remember a successful response, evicting the least recently used entry"""
+        self._exact_cache[key] = dict(response)
+        self._exact_cache.move_to_end(key)
+        if len(self._exact_cache) > self.config.response_cache_size:
+            self._exact_cache.popitem(last=False)
+    
     def get_context(self) -> Dict[str, Any]:
         """Get current context"""
         return self.workflow_pipeline.get_context()
     
     def clear_context(self):
         """Clear current context"""
+        # Cached responses are keyed by conversation, so they stay valid
         self.workflow_pipeline.clear_context()
     
     def get_available_tools(self) -> List[str]:
@@ -211,4 +328,8 @@ class ClaudeCodeSystem:
     async def shutdown(self):
         """Shutdown the system and cleanup resources"""
         await self.model_manager.shutdown()
+        for agent in (self.lead_agent, *self.sub_agents.values()):
+            await agent.tool_executor.shutdown()
+        await self.workflow_pipeline.tool_executor.shutdown()
         self.clear_context()
+        await self.workflow_pipeline.flush_context()
@@ -2,47 +2,85 @@
 Context Manager - Manages conversation history and project state
 """
 
+import asyncio
+import atexit
 import json
 import os
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass, asdict
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Deque, Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 
+try:
+    import orjson
+    
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=True, separators=(",", ":")).encode('utf-8')
+    
+    _loads = json.loads
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Message:
-    """Represents a message in the conversation"""
+    """Represents a message in the conversation (immutable once created)"""
     role: str  # 'user', 'assistant', 'system'
     content: str
-    timestamp: datetime
+    timestamp: float = field(default_factory=time.time)  # epoch seconds
     metadata: Optional[Dict[str, Any]] = None
     tool_calls: Optional[List[Dict[str, Any]]] = None
+    _as_dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
     
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for serialization"""
+    @property
+    def as_dict(self) -> Dict[str, Any]:
+        """Serialized form, built once per message and shared - do not mutate"""
+        if self._as_dict is not None:
+            return self._as_dict
         result = {
             'role': self.role,
             'content': self.content,
-            'timestamp': self.timestamp.isoformat(),
+            'timestamp': datetime.fromtimestamp(self.timestamp).isoformat(),
             'metadata': self.metadata or {}
         }
         if self.tool_calls:
             result['tool_calls'] = self.tool_calls
+        # Slots leave no __dict__ for cached_property, so memoize in a field
+        object.__setattr__(self, '_as_dict', result)
         return result
     
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for serialization"""
+        return dict(self.as_dict)
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Message':
         """Create from dictionary"""
+        timestamp = data['timestamp']
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp).timestamp()
         return cls(
             role=data['role'],
             content=data['content'],
-            timestamp=datetime.fromisoformat(data['timestamp']),
+            timestamp=timestamp,
             metadata=data.get('metadata'),
             tool_calls=data.get('tool_calls')
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class ProjectInfo:
     """Information about the current project"""
     path: str
@@ -70,6 +108,70 @@ class ProjectInfo:
         )
 
 
+_SCAN_WORKERS = 8
+_IGNORED_DIRS = frozenset({"__pycache__", "node_modules"})
+_IGNORED_PREFIX = (".",)
+
+
+def _scan_entries(path: str, rel_prefix: str, files: Dict[str, Any], subdirs: List[tuple]):
+    """
+    Record the files directly under ``path`` and collect its subdirectories
+    
+    Uses ``os.scandir`` so the file type comes from the directory entry and
+    only one stat call is made per file.
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            # Skip hidden entries and common ignore patterns
+            name = entry.name
+            if name.startswith(_IGNORED_PREFIX):
+                continue
+            
+            try:
+                if entry.is_dir():
+                    if name not in _IGNORED_DIRS and not entry.is_symlink():
+                        subdirs.append((entry.path, rel_prefix + name + os.sep))
+                    continue
+                
+                stat = entry.stat()
+                files[rel_prefix + name] = {
+                    'size': stat.st_size,
+                    'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                    'is_file': entry.is_file(),
+                    'is_dir': False
+                }
+            except OSError:
+                # Skip files we can't access
+                continue
+
+
+def _scan_tree(path: str, rel_prefix: str) -> Dict[str, Any]:
+    """Recursively scan a directory tree, returning relative path -> file info"""
+    files = {}
+    pending = [(path, rel_prefix)]
+    
+    while pending:
+        current, current_prefix = pending.pop()
+        try:
+            _scan_entries(current, current_prefix, files, pending)
+        except OSError:
+            continue
+    
+    return files
+
+
+# Managers with a debounced save outstanding; whatever is still unwritten when
+# the interpreter exits (e.g. the loop ended before the timer fired) is saved
+_pending_saves: "weakref.WeakSet[ContextManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _save_pending_at_exit():
+    for manager in list(_pending_saves):
+        if manager._dirty:
+            manager._save_context()
+
+
 class ContextManager:
     """Manages conversation history and project state"""
     
@@ -77,12 +179,37 @@ class ContextManager:
         self.max_messages = max_messages
         self.persist_context = persist_context
         self.context_file = "claude_code_context.json"
+        self.messages_file = "claude_code_messages.jsonl"
+        self.save_delay = 0.5  # seconds to coalesce writes before flushing
+        self.scan_cache_ttl = 5.0  # seconds a project scan may be reused
         
         # Initialize context
-        self.messages: List[Message] = []
+        self.messages: Deque[Message] = deque(maxlen=max_messages)
         self.project: Optional[ProjectInfo] = None
         self.session_data: Dict[str, Any] = {}
         
+        # Debounced persistence state
+        self._dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_loop: Optional[asyncio.AbstractEventLoop] = None  # loop owning _flush_handle
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._pending_messages: List[Message] = []
+        self._rewrite_messages = False
+        self._message_lines = 0  # lines currently in the messages file
+        
+        # abs project path -> (root mtime, scan time, files)
+        self._scan_cache: Dict[str, Tuple[float, float, Dict[str, Any]]] = {}
+        
+        # Last get_context() result, dropped whenever messages/project/session change
+        self._context_snapshot: Optional[Dict[str, Any]] = None
+        
+        # Recent pipeline errors; kept out of the messages sent to the model
+        self.diagnostics: Deque[Dict[str, Any]] = deque(maxlen=50)
+        
+        # Messages added since fork(), for merge(); None unless this is a branch
+        self._branch_messages: Optional[List[Message]] = None
+        
         # Load existing context if persistence is enabled
         if self.persist_context:
             self._load_context()
@@ -100,20 +227,52 @@ class ContextManager:
         message = Message(
             role=role,
             content=content,
-            timestamp=datetime.now(),
             metadata=metadata,
             tool_calls=tool_calls
         )
-        
+        self._append_message(message)
+    
+    def _append_message(self, message: Message):
+        """Record a message in the history (and the save queue when persisting)"""
+        # The deque drops the oldest message once max_messages is reached
         self.messages.append(message)
-        
-        # Trim messages if we exceed the limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages:]
+        self._context_snapshot = None
+        if self._branch_messages is not None:
+            self._branch_messages.append(message)
         
         # Save context if persistence is enabled
         if self.persist_context:
-            self._save_context()
+            self._pending_messages.append(message)
+            self._schedule_save()
+    
+    def fork(self) -> 'ContextManager':
+        """
+        Branch the conversation for work that runs alongside other requests
+        
+        The branch starts from the current messages, project and session data
+        but is not persisted and does not see later changes made here; pass it
+        to ``merge`` to add the messages and diagnostics it recorded.
+        
+        Returns:
+            New context manager holding a copy of this conversation
+        """
+        branch = ContextManager(self.max_messages, persist_context=False)
+        branch.messages.extend(self.messages)
+        branch.project = self.project
+        branch.session_data = dict(self.session_data)
+        branch._branch_messages = []
+        return branch
+    
+    def merge(self, branch: 'ContextManager'):
+        """
+        Append what a branch from ``fork`` recorded since it was made
+        
+        Args:
+            branch: Context manager returned by ``fork``
+        """
+        for message in branch._branch_messages or ():
+            self._append_message(message)
+        self.diagnostics.extend(branch.diagnostics)
     
     def get_messages(self, limit: Optional[int] = None) -> List[Message]:
         """
@@ -126,8 +285,23 @@ class ContextManager:
             List of messages
         """
         if limit is None:
-            return self.messages.copy()
-        return self.messages[-limit:] if limit > 0 else []
+            return list(self.messages)
+        if limit <= 0:
+            return []
+        return list(islice(self.messages, max(len(self.messages) - limit, 0), None))
+    
+    def add_diagnostic(self, error: str):
+        """
+        Record a pipeline error without adding it to the conversation
+        
+        Args:
+            error: Error description
+        """
+        self.diagnostics.append({'error': error, 'timestamp': time.time()})
+    
+    def get_diagnostics(self) -> List[Dict[str, Any]]:
+        """Get the recorded pipeline errors, oldest first"""
+        return list(self.diagnostics)
     
     def get_messages_dict(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
@@ -139,8 +313,8 @@ class ContextManager:
         Returns:
             List of message dictionaries
         """
-        messages = self.get_messages(limit)
-        return [msg.to_dict() for msg in messages]
+        messages = self.messages if limit is None else self.get_messages(limit)
+        return [msg.as_dict for msg in messages]
     
     def set_project(self, project_path: str, project_name: str = None):
         """
@@ -160,7 +334,7 @@ class ContextManager:
             project_name = os.path.basename(os.path.abspath(project_path))
         
         # Scan project files
-        files = self._scan_project_files(project_path)
+        files = self._scan_project_files_cached(os.path.abspath(project_path))
         
         self.project = ProjectInfo(
             path=os.path.abspath(project_path),
@@ -168,10 +342,11 @@ class ContextManager:
             files=files,
             last_updated=datetime.now()
         )
+        self._context_snapshot = None
         
         # Save context if persistence is enabled
         if self.persist_context:
-            self._save_context()
+            self._schedule_save()
     
     def get_project(self) -> Optional[ProjectInfo]:
         """Get current project information"""
@@ -180,17 +355,50 @@ class ContextManager:
     def update_project_files(self):
         """Update the project files information"""
         if self.project and os.path.exists(self.project.path):
-            files = self._scan_project_files(self.project.path)
+            files = self._scan_project_files_cached(self.project.path)
+            if files is self.project.files:
+                return
             self.project.files = files
             self.project.last_updated = datetime.now()
+            self._context_snapshot = None
             
             if self.persist_context:
-                self._save_context()
+                self._schedule_save()
+    
+    def _scan_project_files_cached(self, project_path: str) -> Dict[str, Any]:
+        """
+        Scan project files, reusing a recent scan of the same directory
+        
+        A cached scan is reused while the root directory's mtime is unchanged
+        and the scan is younger than ``scan_cache_ttl``. Within that window
+        changes to existing files in subdirectories are not picked up.
+        
+        Args:
+            project_path: Absolute path to scan
+            
+        Returns:
+            Dictionary mapping file paths to file information
+        """
+        try:
+            root_mtime = os.stat(project_path).st_mtime
+        except OSError:
+            return self._scan_project_files(project_path)
+        
+        now = time.monotonic()
+        cached = self._scan_cache.get(project_path)
+        if cached and cached[0] == root_mtime and now - cached[1] < self.scan_cache_ttl:
+            return cached[2]
+        
+        files = self._scan_project_files(project_path)
+        self._scan_cache[project_path] = (root_mtime, now, files)
+        return files
     
     def _scan_project_files(self, project_path: str) -> Dict[str, Any]:
         """
         Scan project directory for files
         
+        Top-level subdirectories are scanned concurrently in a thread pool.
+        
         Args:
             project_path: Path to scan
             
@@ -198,93 +406,201 @@ class ContextManager:
             Dictionary mapping file paths to file information
         """
         files = {}
+        subdirs = []
         
         try:
-            for root, dirs, filenames in os.walk(project_path):
-                # Skip hidden directories and common ignore patterns
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__', 'node_modules']]
-                
-                for filename in filenames:
-                    if filename.startswith('.'):
-                        continue
-                    
-                    file_path = os.path.join(root, filename)
-                    rel_path = os.path.relpath(file_path, project_path)
-                    
-                    try:
-                        stat = os.stat(file_path)
-                        files[rel_path] = {
-                            'size': stat.st_size,
-                            'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                            'is_file': os.path.isfile(file_path),
-                            'is_dir': os.path.isdir(file_path)
-                        }
-                    except OSError:
-                        # Skip files we can't access
-                        continue
-        
+            _scan_entries(project_path, "", files, subdirs)
         except OSError:
             # If we can't scan the directory, return empty dict
-            pass
+            return files
+        
+        if len(subdirs) > 1:
+            with ThreadPoolExecutor(max_workers=min(_SCAN_WORKERS, len(subdirs))) as executor:
+                for subtree in executor.map(lambda d: _scan_tree(*d), subdirs):
+                    files.update(subtree)
+        else:
+            for path, rel_prefix in subdirs:
+                files.update(_scan_tree(path, rel_prefix))
         
         return files
     
     def set_session_data(self, key: str, value: Any):
         """Set session data"""
         self.session_data[key] = value
+        self._context_snapshot = None
         
         if self.persist_context:
-            self._save_context()
+            self._schedule_save()
     
     def get_session_data(self, key: str, default: Any = None) -> Any:
         """Get session data"""
         return self.session_data.get(key, default)
     
     def get_context(self) -> Dict[str, Any]:
-        """Get the complete context as a dictionary"""
-        context = {
-            'messages': self.get_messages_dict(),
-            'project': self.project.to_dict() if self.project else None,
-            'session_data': self.session_data
-        }
+        """
+        Get the complete context as a dictionary
+        
+        The dictionary is rebuilt only after the context changes, so repeated
+        calls between changes return the same object; callers must treat it
+        as read-only.
+        """
+        context = self._context_snapshot
+        if context is None:
+            context = {
+                'messages': self.get_messages_dict(),
+                'project': self.project.to_dict() if self.project else None,
+                'session_data': self.session_data
+            }
+            self._context_snapshot = context
         return context
     
     def clear_context(self):
         """Clear all context data"""
-        self.messages = []
+        self.messages.clear()
         self.project = None
         self.session_data = {}
+        self._context_snapshot = None
+        self.diagnostics.clear()
         
         if self.persist_context:
+            self._pending_messages = []
+            self._rewrite_messages = True
+            self._schedule_save()
+    
+    def _schedule_save(self):
+        """
+        Mark the context dirty and schedule a coalesced background flush
+        
+        Without a running event loop the context is written immediately. A
+        timer left on another (finished) loop never fires, so it is dropped
+        and the flush is rescheduled here; changes still unwritten when the
+        interpreter exits are saved by an atexit hook.
+        """
+        self._dirty = True
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
             self._save_context()
+            return
+        
+        if self._flush_handle is not None and self._flush_loop is not loop:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.save_delay, self._start_flush)
+            self._flush_loop = loop
+            _pending_saves.add(self)
     
-    def _save_context(self):
-        """Save context to file"""
+    def _start_flush(self):
+        """Timer callback that launches the background flush"""
+        self._flush_handle = None
+        self._flush_loop = None
+        self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+    
+    async def flush(self):
+        """Write pending context changes to disk without blocking the event loop"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+            self._flush_loop = None
+        
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            
+            # Snapshot on the loop thread, write in a worker thread
+            context_data = self._build_context_data()
+            message_lines, rewrite = self._collect_message_lines()
+            self._dirty = False
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_context, context_data, message_lines, rewrite)
+    
+    def _build_context_data(self) -> Dict[str, Any]:
+        """Build the project/session snapshot (messages live in the JSONL log)"""
+        return {
+            'project': self.project.to_dict() if self.project else None,
+            'session_data': self.session_data,
+            'saved_at': datetime.now().isoformat()
+        }
+    
+    def _collect_message_lines(self):
+        """
+        Serialize messages that still need to reach the messages log
+        
+        Returns:
+            Tuple of (lines, rewrite). When rewrite is True the lines replace
+            the whole log, which happens after clear_context or once the log
+            grows past twice max_messages.
+        """
+        if not self._rewrite_messages and self._message_lines + len(self._pending_messages) > 2 * self.max_messages:
+            self._rewrite_messages = True
+        
+        if self._rewrite_messages:
+            messages = self.messages
+            self._message_lines = len(messages)
+        else:
+            messages = self._pending_messages
+            self._message_lines += len(messages)
+        
+        rewrite = self._rewrite_messages
+        self._pending_messages = []
+        self._rewrite_messages = False
+        return [_dumps(msg.as_dict) for msg in messages], rewrite
+    
+    def _write_context(self, context_data: Dict[str, Any], message_lines: List[bytes], rewrite: bool):
+        """Append (or rewrite) the messages log and atomically write the snapshot"""
         try:
-            context_data = {
-                'messages': [msg.to_dict() for msg in self.messages],
-                'project': self.project.to_dict() if self.project else None,
-                'session_data': self.session_data,
-                'saved_at': datetime.now().isoformat()
-            }
+            payload = b"".join(line + b"\n" for line in message_lines)
+            if rewrite:
+                tmp_file = self.messages_file + ".tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_file, self.messages_file)
+            elif payload:
+                with open(self.messages_file, 'ab') as f:
+                    f.write(payload)
             
-            with open(self.context_file, 'w', encoding='utf-8') as f:
-                json.dump(context_data, f, indent=2, ensure_ascii=False)
+            tmp_file = self.context_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(_dumps(context_data))
+            os.replace(tmp_file, self.context_file)
         
         except Exception as e:
             # If we can't save, just continue without error
             pass
     
+    def _save_context(self):
+        """Save context to file"""
+        message_lines, rewrite = self._collect_message_lines()
+        self._dirty = False
+        self._write_context(self._build_context_data(), message_lines, rewrite)
+    
     def _load_context(self):
         """Load context from file"""
         try:
+            if os.path.exists(self.messages_file):
+                with open(self.messages_file, 'rb') as f:
+                    line_count = 0
+                    tail = deque(maxlen=self.max_messages)
+                    for line in f:
+                        line_count += 1
+                        tail.append(line)
+                self._message_lines = line_count
+                self.messages.extend(Message.from_dict(_loads(line)) for line in tail if line.strip())
+            
             if os.path.exists(self.context_file):
-                with open(self.context_file, 'r', encoding='utf-8') as f:
-                    context_data = json.load(f)
-                
-                # Load messages
-                if 'messages' in context_data:
-                    self.messages = [Message.from_dict(msg) for msg in context_data['messages']]
+                if ijson is not None and not self.messages:
+                    context_data = self._stream_legacy_context()
+                else:
+                    with open(self.context_file, 'rb') as f:
+                        context_data = _loads(f.read())
+                    
+                    # Migrate messages from the legacy single-file format
+                    if 'messages' in context_data and not self.messages:
+                        self.messages.extend(Message.from_dict(msg) for msg in context_data['messages'])
+                        self._rewrite_messages = True
                 
                 # Load project
                 if 'project' in context_data and context_data['project']:
@@ -296,10 +612,35 @@ class ContextManager:
         
         except Exception as e:
             # If we can't load, start with empty context
-            self.messages = []
+            self.messages.clear()
             self.project = None
             self.session_data = {}
     
+    def _stream_legacy_context(self) -> Dict[str, Any]:
+        """
+        Read the snapshot with ijson, migrating any legacy 'messages' array
+        
+        Legacy snapshots embed the whole conversation, so messages are
+        streamed straight into the bounded deque instead of being
+        materialized as one list first.
+        
+        Returns:
+            The snapshot's 'project' and 'session_data' entries
+        """
+        context_data: Dict[str, Any] = {}
+        with open(self.context_file, 'rb') as f:
+            migrated = False
+            for msg in ijson.items(f, 'messages.item', use_float=True):
+                self.messages.append(Message.from_dict(msg))
+                migrated = True
+            self._rewrite_messages = migrated
+            
+            for key in ('project', 'session_data'):
+                f.seek(0)
+                for value in ijson.items(f, key, use_float=True):
+                    context_data[key] = value
+        return context_data
+    
     def get_context_summary(self) -> str:
         """Get a summary of the current context"""
         summary_parts = []
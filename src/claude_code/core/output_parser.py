@@ -7,8 +7,23 @@ import json
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 
+try:
+    import orjson
+    
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers keep
+    # catching the stdlib exception
+    _loads = orjson.loads
+    
+    def _dumps_indented(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps_indented(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
 
-@dataclass
+
+@dataclass(slots=True)
 class ToolAction:
     """Represents a tool action to be executed"""
     tool_name: str
@@ -16,7 +31,7 @@ class ToolAction:
     action_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedOutput:
     """Represents parsed agent output"""
     content: str
@@ -28,20 +43,29 @@ class OutputParser:
     """Parses agent responses to extract content and tool actions"""
     
     def __init__(self):
-        # Pattern to match tool calls in various formats
-        self.tool_patterns = [
+        # Pattern to match tool calls in various formats, fused into one
+        # alternation so the response is scanned in a single pass
+        self._tool_re = re.compile(
             # Format: <tool_name>{"param1": "value1", "param2": "value2"}</tool_name>
-            r'<(\w+)>({.*?})</\1>',
+            r'<(?P<xn>\w+)>(?P<xp>{.*?})</(?P=xn)>'
             # Format: [tool_name: {"param1": "value1", "param2": "value2"}]
-            r'\[(\w+):\s*({.*?})\]',
+            r'|\[(?P<bn>\w+):\s*(?P<bp>{.*?})\]'
             # Format: TOOL_CALL: tool_name {"param1": "value1"}
-            r'TOOL_CALL:\s*(\w+)\s*({.*?})',
+            r'|TOOL_CALL:\s*(?P<tn>\w+)\s*(?P<tp>{.*?})'
             # Format: <tool_call tool="tool_name" params='{"param1": "value1"}' />
-            r'<tool_call\s+tool="(\w+)"\s+params=\'({.*?})\'\s*/>',
-        ]
+            r'|<tool_call\s+tool="(?P<cn>\w+)"\s+params=\'(?P<cp>{.*?})\'\s*/>',
+            re.DOTALL
+        )
         
         # Pattern to match action IDs
         self.action_id_pattern = r'action_id["\']?\s*:\s*["\']?([^"\']+)["\']?'
+        
+        # Compiled once so parsing never goes through the re module cache
+        self._action_id_re = re.compile(self.action_id_pattern)
+        self._kv_re = re.compile(r'(\w+)=["\']([^"\']*)["\']')
+        self._blank_lines_re = re.compile(r'\n\s*\n')
+        self._tag_re = re.compile(r'<[^>]*>')
+        self._bracket_re = re.compile(r'\[[^\]]*\]')
     
     def parse(self, response) -> ParsedOutput:
         """
@@ -57,46 +81,65 @@ class OutputParser:
         if isinstance(response, dict) and "tool_calls" in response:
             return self._parse_kimi_response(response)
         
+        # Fast path: every tool-call format needs '<', '[' or 'TOOL_CALL:', so
+        # plain replies skip the tool regex and the artifact cleanup entirely
+        if '<' not in response and '[' not in response and 'TOOL_CALL:' not in response:
+            return ParsedOutput(
+                content=self._blank_lines_re.sub('\n\n', response).strip(),
+                tool_actions=[],
+                has_tool_actions=False
+            )
+        
         # Handle string response
-        content = response
         tool_actions = []
+        # Spans of recognised tool calls, cut out of the content in one pass
+        cut_spans = []
         
-        # Try each pattern to find tool calls
-        for pattern in self.tool_patterns:
-            matches = re.finditer(pattern, response, re.DOTALL)
-            for match in matches:
-                tool_name = match.group(1)
-                params_str = match.group(2)
+        # Find tool calls of every format in one pass
+        for match in self._tool_re.finditer(response):
+            tool_name = match.group('xn') or match.group('bn') or match.group('tn') or match.group('cn')
+            params_str = match.group('xp') or match.group('bp') or match.group('tp') or match.group('cp')
+            
+            try:
+                # Parse parameters JSON
+                parameters = _loads(params_str)
                 
-                try:
-                    # Parse parameters JSON
-                    parameters = json.loads(params_str)
-                    
-                    # Extract action ID if present
-                    action_id = self._extract_action_id(parameters)
-                    
-                    # Create tool action
+                # Extract action ID if present
+                action_id = self._extract_action_id(parameters)
+                
+                # Create tool action
+                tool_action = ToolAction(
+                    tool_name=tool_name,
+                    parameters=parameters,
+                    action_id=action_id
+                )
+                
+                tool_actions.append(tool_action)
+                cut_spans.append(match.span())
+                
+            except json.JSONDecodeError:
+                # If JSON parsing fails, try to extract parameters as key-value pairs
+                parameters = self._parse_parameters_text(params_str)
+                if parameters:
                     tool_action = ToolAction(
                         tool_name=tool_name,
-                        parameters=parameters,
-                        action_id=action_id
+                        parameters=parameters
                     )
-                    
                     tool_actions.append(tool_action)
-                    
-                    # Remove the tool call from content
-                    content = content.replace(match.group(0), '').strip()
-                    
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, try to extract parameters as key-value pairs
-                    parameters = self._parse_parameters_text(params_str)
-                    if parameters:
-                        tool_action = ToolAction(
-                            tool_name=tool_name,
-                            parameters=parameters
-                        )
-                        tool_actions.append(tool_action)
-                        content = content.replace(match.group(0), '').strip()
+                    cut_spans.append(match.span())
+        
+        # Rebuild content without the tool calls (finditer spans are ordered
+        # and never overlap)
+        if cut_spans:
+            parts = []
+            prev = 0
+            for start, end in cut_spans:
+                parts.append(response[prev:start])
+                prev = end
+            parts.append(response[prev:])
+            content = "".join(parts)
+        else:
+            content = response
         
         # Clean up content
         content = self._clean_content(content)
@@ -121,7 +164,7 @@ class OutputParser:
                     action_id = tool_call.get("id")
                     
                     try:
-                        parameters = json.loads(arguments)
+                        parameters = _loads(arguments)
                     except json.JSONDecodeError:
                         parameters = {}
                     
@@ -150,8 +193,7 @@ class OutputParser:
         
         # Try to extract key-value pairs
         # Format: key1="value1" key2="value2"
-        kv_pattern = r'(\w+)=["\']([^"\']*)["\']'
-        matches = re.findall(kv_pattern, params_str)
+        matches = self._kv_re.findall(params_str)
         
         for key, value in matches:
             # Try to convert to appropriate type
@@ -167,12 +209,12 @@ class OutputParser:
     def _clean_content(self, content: str) -> str:
         """Clean up the content string"""
         # Remove extra whitespace
-        content = re.sub(r'\n\s*\n', '\n\n', content)
+        content = self._blank_lines_re.sub('\n\n', content)
         content = content.strip()
         
         # Remove any remaining tool call artifacts
-        content = re.sub(r'<[^>]*>', '', content)
-        content = re.sub(r'\[[^\]]*\]', '', content)
+        content = self._tag_re.sub('', content)
+        content = self._bracket_re.sub('', content)
         
         return content
     
@@ -192,7 +234,7 @@ class OutputParser:
         if action_id:
             parameters['action_id'] = action_id
         
-        params_json = json.dumps(parameters, indent=2)
+        params_json = _dumps_indented(parameters)
         return f'<{tool_name}>{params_json}</{tool_name}>'
     
     def get_tool_usage_instructions(self) -> str:
@@ -3,6 +3,10 @@ Tool Executor - Executes tool actions and returns results
 """
 
 import asyncio
+import os
+import shutil
+import tempfile
+import uuid
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from .output_parser import ToolAction, ParsedOutput
@@ -12,8 +16,38 @@ from ..tools import (
     TodoWriteTool, WebSearchTool, ExitTool
 )
 
+# Default tool set, instantiated lazily on first use
+_TOOL_CLASSES: Dict[str, type] = {
+    "Task": TaskTool,
+    "Bash": BashTool,
+    "Glob": GlobTool,
+    "Grep": GrepTool,
+    "LS": LSTool,
+    "Read": ReadTool,
+    "Edit": EditTool,
+    "Write": WriteTool,
+    "WebFetch": WebFetchTool,
+    "TodoWrite": TodoWriteTool,
+    "WebSearch": WebSearchTool,
+    "Exit": ExitTool,
+}
 
-@dataclass
+# Tools with no side effects that may run concurrently with each other
+_PARALLEL_SAFE = frozenset({"Read", "Glob", "Grep", "LS", "WebFetch", "WebSearch"})
+
+# Tools that mutate shared state; each gets its own lock per executor
+_LOCKED_TOOLS = ("Write", "Edit", "TodoWrite", "Bash")
+
+# Bash/Glob payloads longer than this are written to a scratch file and only
+# summarized in the conversation, so one large listing can't flood the context
+_OFFLOAD_THRESHOLD = 8000
+# Characters of offloaded Bash output quoted inline
+_PREVIEW_CHARS = 500
+# Newest Glob matches named in an offloaded summary
+_GLOB_PREVIEW_COUNT = 5
+
+
+@dataclass(slots=True)
 class ToolResult:
     """Represents the result of a tool execution"""
     tool_name: str
@@ -21,45 +55,112 @@ class ToolResult:
     result: Any
     error: Optional[str] = None
     action_id: Optional[str] = None
+    
+    def to_response_dict(self) -> Dict[str, Any]:
+        """Public fields of the result for API responses"""
+        return {
+            "tool_name": self.tool_name,
+            "success": self.success,
+            "result": self.result,
+            "error": self.error,
+            "action_id": self.action_id
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class ExecutionResult:
     """Represents the result of executing all tool actions"""
     results: List[ToolResult]
     success_count: int
     error_count: int
     has_errors: bool = False
+    
+    def to_response_dict(self) -> Dict[str, Any]:
+        """Public fields of the execution result for API responses"""
+        return {
+            "results": [result.to_response_dict() for result in self.results],
+            "success_count": self.success_count,
+            "error_count": self.error_count,
+            "has_errors": self.has_errors
+        }
 
 
 class ToolExecutor:
     """Executes tool actions and manages tool results"""
     
-    def __init__(self):
-        self.tools = {}
-        self._initialize_tools()
-    
-    def _initialize_tools(self):
-        """Initialize all available tools"""
-        # Core tools
-        self.tools["Task"] = TaskTool()
-        self.tools["Bash"] = BashTool()
-        self.tools["Glob"] = GlobTool()
-        self.tools["Grep"] = GrepTool()
-        self.tools["LS"] = LSTool()
-        self.tools["Read"] = ReadTool()
-        self.tools["Edit"] = EditTool()
-        self.tools["Write"] = WriteTool()
-        self.tools["WebFetch"] = WebFetchTool()
-        self.tools["TodoWrite"] = TodoWriteTool()
-        self.tools["WebSearch"] = WebSearchTool()
-        self.tools["Exit"] = ExitTool()
+    def __init__(self, tools: Optional[Dict[str, Any]] = None, scratch_dir: Optional[str] = None):
+        """
+        Args:
+            tools: Tool instances to execute (defaults to the full tool set,
+                with each tool constructed the first time it is needed)
+            scratch_dir: Directory for offloaded tool output (defaults to a
+                temporary directory created on first use and removed by
+                ``shutdown``; a directory passed here is left in place)
+        """
+        self._scratch_dir = scratch_dir
+        self._owns_scratch_dir = False
+        self.tools = tools if tools is not None else {}
+        self._tool_classes = {} if tools is not None else _TOOL_CLASSES
+        self._sub_agents: Optional[Dict[str, Any]] = None
+        # Serialize mutating tools across concurrent callers of this executor
+        # (e.g. batched requests) without blocking unrelated tools
+        self._tool_locks = {name: asyncio.Lock() for name in _LOCKED_TOOLS}
+        
+        # Resolve each tool's entry point once instead of probing per call
+        self._tool_callables = {name: self._resolve_callable(tool) for name, tool in self.tools.items()}
+    
+    def _get_tool(self, tool_name: str) -> Optional[Any]:
+        """Return a tool instance, constructing default tools on first use"""
+        tool = self.tools.get(tool_name)
+        if tool is None:
+            tool_class = self._tool_classes.get(tool_name)
+            if tool_class is None:
+                return None
+            tool = tool_class()
+            if self._sub_agents is not None and hasattr(tool, 'set_sub_agents'):
+                tool.set_sub_agents(self._sub_agents)
+            self.tools[tool_name] = tool
+        # Tools may also be added to self.tools directly
+        if tool_name not in self._tool_callables:
+            self._tool_callables[tool_name] = self._resolve_callable(tool)
+        return tool
+    
+    @staticmethod
+    def _resolve_callable(tool: Any):
+        """Pick the coroutine function used to run a tool"""
+        if hasattr(tool, 'execute'):
+            return tool.execute
+        if hasattr(tool, 'run'):
+            return tool.run
+        # Fall back to calling the tool directly with parameters
+        return tool
+    
+    def set_tools(self, tools: Dict[str, Any]):
+        """Replace the tool set (e.g. with an agent's filtered tools)"""
+        if tools is self.tools:
+            return
+        self.tools = tools
+        self._tool_classes = {}
+        self._tool_callables = {name: self._resolve_callable(tool) for name, tool in tools.items()}
     
     def set_sub_agents(self, sub_agents: Dict[str, Any]):
         """Set sub-agents for tools that need them"""
+        self._sub_agents = sub_agents
         if "Task" in self.tools:
             self.tools["Task"].set_sub_agents(sub_agents)
     
+    def add_sub_agent(self, name: str, agent: Any):
+        """Make a single sub-agent available without rebuilding the mapping"""
+        if self._sub_agents is None:
+            self.set_sub_agents({})
+        # TaskTool holds the same dict, so it sees the new entry too
+        self._sub_agents[name] = agent
+    
+    def remove_sub_agent(self, name: str):
+        """Withdraw a single sub-agent"""
+        if self._sub_agents is not None:
+            self._sub_agents.pop(name, None)
+    
     async def execute_tool_actions(self, tool_actions: List[ToolAction], 
                                  context: Optional[Dict[str, Any]] = None) -> ExecutionResult:
         """
@@ -76,18 +177,23 @@ class ToolExecutor:
             return ExecutionResult(results=[], success_count=0, error_count=0)
         
         results = []
-        success_count = 0
-        error_count = 0
         
-        # Execute tools sequentially to avoid conflicts
+        # Runs of consecutive read-only tools execute concurrently; any other
+        # tool acts as a barrier so reads never overtake an earlier write
+        batch = []
         for tool_action in tool_actions:
-            result = await self._execute_single_tool(tool_action, context)
-            results.append(result)
-            
-            if result.success:
-                success_count += 1
-            else:
-                error_count += 1
+            if tool_action.tool_name in _PARALLEL_SAFE:
+                batch.append(tool_action)
+                continue
+            if batch:
+                results.extend(await self._execute_batch(batch, context))
+                batch = []
+            results.append(await self._execute_single_tool(tool_action, context))
+        if batch:
+            results.extend(await self._execute_batch(batch, context))
+        
+        success_count = sum(1 for result in results if result.success)
+        error_count = len(results) - success_count
         
         return ExecutionResult(
             results=results,
@@ -96,6 +202,15 @@ class ToolExecutor:
             has_errors=error_count > 0
         )
     
+    async def _execute_batch(self, tool_actions: List[ToolAction], 
+                           context: Optional[Dict[str, Any]]) -> List[ToolResult]:
+        """Execute independent tool actions concurrently, preserving their order"""
+        if len(tool_actions) == 1:
+            return [await self._execute_single_tool(tool_actions[0], context)]
+        return list(await asyncio.gather(
+            *(self._execute_single_tool(tool_action, context) for tool_action in tool_actions)
+        ))
+    
     async def _execute_single_tool(self, tool_action: ToolAction, 
                                  context: Optional[Dict[str, Any]]) -> ToolResult:
         """
@@ -112,7 +227,10 @@ class ToolExecutor:
         parameters = tool_action.parameters
         action_id = tool_action.action_id
         
-        if tool_name not in self.tools:
+        tool_callable = self._tool_callables.get(tool_name)
+        if tool_callable is None and self._get_tool(tool_name) is not None:
+            tool_callable = self._tool_callables[tool_name]
+        if tool_callable is None:
             return ToolResult(
                 tool_name=tool_name,
                 success=False,
@@ -122,16 +240,13 @@ class ToolExecutor:
             )
         
         try:
-            tool = self.tools[tool_name]
-            
             # Execute the tool
-            if hasattr(tool, 'execute'):
-                result = await tool.execute(**parameters)
-            elif hasattr(tool, 'run'):
-                result = await tool.run(**parameters)
+            lock = self._tool_locks.get(tool_name)
+            if lock is not None:
+                async with lock:
+                    result = await tool_callable(**parameters)
             else:
-                # Try to call the tool directly with parameters
-                result = await tool(**parameters)
+                result = await tool_callable(**parameters)
             
             return ToolResult(
                 tool_name=tool_name,
@@ -149,16 +264,27 @@ class ToolExecutor:
                 action_id=action_id
             )
     
+    async def shutdown(self):
+        """Release resources held by tools (e.g. BashTool's persistent shell) and offloaded output"""
+        for tool in self.tools.values():
+            if hasattr(tool, 'shutdown'):
+                await tool.shutdown()
+        if self._owns_scratch_dir:
+            shutil.rmtree(self._scratch_dir, ignore_errors=True)
+            self._scratch_dir = None
+            self._owns_scratch_dir = False
+    
     def get_available_tools(self) -> List[str]:
         """Get list of available tools"""
-        return list(self.tools.keys())
+        # Lazily built default tools are always a subset of the class table
+        return list(self._tool_classes or self.tools)
     
     def get_tool_info(self, tool_name: str) -> Optional[Dict[str, Any]]:
         """Get information about a specific tool"""
-        if tool_name not in self.tools:
+        tool = self._get_tool(tool_name)
+        if tool is None:
             return None
         
-        tool = self.tools[tool_name]
         return {
             "name": tool_name,
             "description": getattr(tool, 'description', 'No description available'),
@@ -166,6 +292,69 @@ class ToolExecutor:
             "capabilities": getattr(tool, 'capabilities', [])
         }
     
+    def _display_result(self, tool_name: str, result: Any) -> Any:
+        """Pick what to show for a successful tool call"""
+        # Check if result is a dict with error field (tool internal error)
+        if isinstance(result, dict) and 'error' in result:
+            if result['error'] is None:
+                # Success case - show the actual result data
+                return self._summarize(tool_name, result.get('result', result))
+            # Tool internal error - show error message
+            return f"Error: {result['error']}"
+        # Direct result (not a dict with error field)
+        return result
+    
+    def _summarize(self, tool_name: str, data: Any) -> Any:
+        """
+        Replace an oversized Bash/Glob payload with a short summary
+        
+        The full payload is written to a scratch file whose path is given in
+        the summary, so the agent can still Read or Grep it when needed.
+        
+        Args:
+            tool_name: Name of the tool that produced the data
+            data: Result data of a successful tool call
+            
+        Returns:
+            The summary, or the data unchanged when it is small enough (or
+            could not be offloaded)
+        """
+        if tool_name == "Glob" and isinstance(data, list):
+            payload = "\n".join(map(str, data))
+            if len(payload) <= _OFFLOAD_THRESHOLD:
+                return data
+            path = self._offload(payload)
+            if path is None:
+                return data
+            newest = ", ".join(map(str, data[:_GLOB_PREVIEW_COUNT]))
+            return f"✓ Glob matched {len(data)} files, newest: {newest} [full list offloaded to {path}]"
+        
+        if tool_name == "Bash" and isinstance(data, str) and len(data) > _OFFLOAD_THRESHOLD:
+            path = self._offload(data)
+            if path is None:
+                return data
+            lines = data.count("\n") + (not data.endswith("\n"))
+            size = len(data.encode('utf-8', errors='replace'))
+            return (f"✓ Command executed ({lines} lines, {size} bytes) [offloaded to {path}], "
+                    f"first {_PREVIEW_CHARS} chars:\n{data[:_PREVIEW_CHARS]}")
+        
+        return data
+    
+    def _offload(self, payload: str) -> Optional[str]:
+        """Write a tool payload to a new scratch file, returning its path (None on failure)"""
+        try:
+            if self._scratch_dir is None:
+                self._scratch_dir = tempfile.mkdtemp(prefix="claude_code_scratch_")
+                self._owns_scratch_dir = True
+            else:
+                os.makedirs(self._scratch_dir, exist_ok=True)
+            path = os.path.join(self._scratch_dir, f"{uuid.uuid4().hex}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+        except OSError:
+            return None
+        return path
+    
     def format_tool_results(self, execution_result: ExecutionResult) -> str:
         """
         Format tool execution results for display
@@ -179,24 +368,11 @@ class ToolExecutor:
         if not execution_result.results:
             return "No tools were executed."
         
-        formatted_results = []
-        
-        for result in execution_result.results:
-            if result.success:
-                # Check if result.result is a dict with error field (tool internal error)
-                if isinstance(result.result, dict) and 'error' in result.result:
-                    if result.result['error'] is None:
-                        # Success case - show the actual result data
-                        display_result = result.result.get('result', result.result)
-                    else:
-                        # Tool internal error - show error message
-                        display_result = f"Error: {result.result['error']}"
-                else:
-                    # Direct result (not a dict with error field)
-                    display_result = result.result
-                formatted_results.append(f"✅ {result.tool_name}: {display_result}")
-            else:
-                formatted_results.append(f"❌ {result.tool_name}: {result.error}")
+        formatted_results = [
+            f"✅ {result.tool_name}: {self._display_result(result.tool_name, result.result)}" if result.success
+            else f"❌ {result.tool_name}: {result.error}"
+            for result in execution_result.results
+        ]
         
         summary = f"\nTool execution summary: {execution_result.success_count} successful, {execution_result.error_count} failed"
         
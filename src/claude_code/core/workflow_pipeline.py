@@ -3,7 +3,8 @@ Workflow Pipeline - Main pipeline that orchestrates the agent framework
 """
 
 import asyncio
-from typing import Dict, Any, List, Optional
+import logging
+from typing import Dict, Any, List, Mapping, Optional
 from dataclasses import dataclass
 import time
 
@@ -15,7 +16,7 @@ from ..agents.base_agent import BaseAgent
 from ..utils.logger import get_logger, log_function_call, log_function_result, log_error, log_performance
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowResult:
     """Result of a workflow execution"""
     content: str
@@ -42,8 +43,9 @@ class WorkflowPipeline:
         self.model_manager = model_manager
         self.logger = get_logger("claude_code.workflow")
         
-        log_function_call(self.logger, "WorkflowPipeline.__init__", 
-                         lead_agent=lead_agent.name, model_manager=model_manager is not None)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            log_function_call(self.logger, "WorkflowPipeline.__init__", 
+                             lead_agent=lead_agent.name, model_manager=model_manager is not None)
         
         try:
             # Initialize components
@@ -71,17 +73,16 @@ class WorkflowPipeline:
     
     def register_sub_agent(self, agent: BaseAgent, priority: int = 0):
         """Register a sub-agent"""
-        log_function_call(self.logger, "WorkflowPipeline.register_sub_agent", 
-                         agent_name=agent.name, priority=priority)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            log_function_call(self.logger, "WorkflowPipeline.register_sub_agent", 
+                             agent_name=agent.name, priority=priority)
         
         try:
             self.agent_registry.register_agent(agent, priority)
-            self.logger.info(f"Registered sub-agent: {agent.name}")
+            self.logger.info("Registered sub-agent: %s", agent.name)
             
-            # Update tool executor with new sub-agents
-            sub_agents = {name: info.agent for name, info in self.agent_registry.agents.items()}
-            self.tool_executor.set_sub_agents(sub_agents)
-            self.logger.debug(f"Updated tool executor with {len(sub_agents)} sub-agents")
+            # Update tool executor with the new sub-agent
+            self.tool_executor.add_sub_agent(agent.name, agent)
             
             log_function_result(self.logger, "WorkflowPipeline.register_sub_agent", "Success", True)
             
@@ -89,77 +90,86 @@ class WorkflowPipeline:
             log_error(self.logger, e, "WorkflowPipeline.register_sub_agent")
             raise
     
+    def unregister_sub_agent(self, agent_name: str) -> bool:
+        """Unregister a sub-agent and withdraw it from the tool executor"""
+        removed = self.agent_registry.unregister_agent(agent_name)
+        if removed:
+            self.tool_executor.remove_sub_agent(agent_name)
+        return removed
+    
+    def register_sub_agents(self, agents: Mapping[str, BaseAgent], priority: int = 0):
+        """
+        Register several sub-agents and update the tool executor once
+        
+        Args:
+            agents: Mapping of sub-agent name to agent instance
+            priority: Priority level applied to every agent
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            log_function_call(self.logger, "WorkflowPipeline.register_sub_agents", 
+                             agent_names=list(agents), priority=priority)
+        
+        try:
+            self.agent_registry.register_many([(agent, priority) for agent in agents.values()])
+            self.logger.info("Registered %d sub-agents", len(agents))
+            
+            # Update tool executor with the new sub-agents
+            for agent in agents.values():
+                self.tool_executor.add_sub_agent(agent.name, agent)
+            
+            log_function_result(self.logger, "WorkflowPipeline.register_sub_agents", "Success", True)
+            
+        except Exception as e:
+            log_error(self.logger, e, "WorkflowPipeline.register_sub_agents")
+            raise
+    
     def set_model_manager(self, model_manager):
         """Set the model manager for all agents"""
         self.model_manager = model_manager
         self.lead_agent.set_model_manager(model_manager)
         
         # Set model manager for all sub-agents
-        for agent_info in self.agent_registry.agents.values():
-            agent_info.agent.set_model_manager(model_manager)
+        for agent in self.agent_registry.iter_agents():
+            agent.set_model_manager(model_manager)
     
-    async def process_request(self, request: str, context: Optional[Dict[str, Any]] = None) -> WorkflowResult:
+    async def process_request(self, request: str, context: Optional[Dict[str, Any]] = None,
+                              context_manager: Optional[ContextManager] = None) -> WorkflowResult:
         """
         Process a user request through the workflow pipeline with loop-based execution
         
         Args:
             request: User's request/query
             context: Optional context information
+            context_manager: Conversation to record the exchange in (defaults
+                to the pipeline's own, see ``ContextManager.fork``)
             
         Returns:
             WorkflowResult containing the response and execution details
         """
-        log_function_call(self.logger, "WorkflowPipeline.process_request", 
-                         request=request[:100] + "..." if len(request) > 100 else request,
-                         context_keys=list(context.keys()) if context else None)
-        start_time = time.time()
+        if self.logger.isEnabledFor(logging.DEBUG):
+            log_function_call(self.logger, "WorkflowPipeline.process_request", 
+                             request=request[:100] + "..." if len(request) > 100 else request,
+                             context_keys=list(context.keys()) if context else None)
+        info_enabled = self.logger.isEnabledFor(logging.INFO)
+        start_time = time.perf_counter() if info_enabled else 0.0
         
         try:
-            # Update context manager
-            if context:
-                self.logger.debug("Updating context with provided data")
-                self.context_manager.session_data.update(context)
-            
-            # Add user message to context
-            self.logger.debug("Adding user message to context")
-            self.context_manager.add_message("user", request)
-            
-            # Get current context for agents
-            current_context = self.context_manager.get_context()
-            self.logger.debug(f"Context contains {len(current_context.get('messages', []))} messages")
-            
             # Process with lead agent (now supports loop-based execution)
             self.logger.info("Processing request with lead agent")
-            agent_response = await self.lead_agent.execute(request, current_context)
-            
-            # Add agent response to context
-            self.logger.debug("Adding agent response to context")
-            self.context_manager.add_message("assistant", agent_response.content, tool_calls=agent_response.tool_calls)
-            
-            duration = time.time() - start_time
-            log_performance(self.logger, "WorkflowPipeline.process_request", duration,
-                          agent_used=self.lead_agent.name, success=True)
-            
-            result = WorkflowResult(
-                content=agent_response.content,
-                tool_results=[],  # Tool results are now handled within the agent loop
-                agent_used=self.lead_agent.name,
-                success=True
-            )
+            result = await self._execute_on_agent(self.lead_agent, request, context,
+                                                  context_manager=context_manager)
             
+            if info_enabled:
+                duration = time.perf_counter() - start_time
+                log_performance(self.logger, "WorkflowPipeline.process_request", duration,
+                              agent_used=self.lead_agent.name, success=True)
             log_function_result(self.logger, "WorkflowPipeline.process_request", "Success", True)
             return result
             
         except Exception as e:
             log_error(self.logger, e, "WorkflowPipeline.process_request")
             error_msg = f"Error processing request: {str(e)}"
-            
-            '''
-            # Remove the last user message that caused the error and add error message
-            if self.context_manager.messages and self.context_manager.messages[-1].role == "user":
-                self.context_manager.messages.pop()
-            '''
-            self.context_manager.add_message("user", f"Error: {error_msg}")
+            self._record_error(error_msg, context_manager)
             
             result = WorkflowResult(
                 content="I encountered an error while processing your request. Please try again.",
@@ -195,39 +205,13 @@ class WorkflowPipeline:
                     error=f"Sub-agent '{agent_name}' not found"
                 )
             
-            # Update context manager
-            if context:
-                self.context_manager.session_data.update(context)
-            
-            # Add user message to context
-            self.context_manager.add_message("user", request)
-            
-            # Get current context for agents
-            current_context = self.context_manager.get_context()
-            
             # Process with sub-agent (now supports loop-based execution)
-            agent_response = await sub_agent.execute(request, current_context)
-            
-            # Add agent response to context
-            self.context_manager.add_message("assistant", agent_response.content, 
-                                           metadata={"agent": agent_name}, tool_calls=agent_response.tool_calls)
-            
-            return WorkflowResult(
-                content=agent_response.content,
-                tool_results=[],  # Tool results are now handled within the agent loop
-                agent_used=agent_name,
-                success=True
-            )
+            return await self._execute_on_agent(sub_agent, request, context, metadata={"agent": agent_name})
             
         except Exception as e:
+            log_error(self.logger, e, "WorkflowPipeline.process_with_sub_agent")
             error_msg = f"Error processing request with sub-agent: {str(e)}"
-            
-            '''
-            # Remove the last user message that caused the error and add error message
-            if self.context_manager.messages and self.context_manager.messages[-1].role == "user":
-                self.context_manager.messages.pop()
-            '''
-            self.context_manager.add_message("user", f"Error: {error_msg}")
+            self._record_error(error_msg)
             
             return WorkflowResult(
                 content="I encountered an error while processing your request. Please try again.",
@@ -236,6 +220,57 @@ class WorkflowPipeline:
                 error=error_msg
             )
     
+    def _record_error(self, error_msg: str, context_manager: Optional[ContextManager] = None):
+        """Keep a failure as a diagnostic, out of the conversation so later prompts don't re-send it"""
+        (context_manager or self.context_manager).add_diagnostic(error_msg)
+    
+    async def _execute_on_agent(self, agent: BaseAgent, request: str,
+                                context: Optional[Dict[str, Any]] = None,
+                                metadata: Optional[Dict[str, Any]] = None,
+                                context_manager: Optional[ContextManager] = None) -> WorkflowResult:
+        """
+        Run a request on an agent, recording the exchange in the context
+        
+        Args:
+            agent: Agent that handles the request
+            request: User's request/query
+            context: Optional context information merged into the session data
+            metadata: Optional metadata stored with the assistant message
+            context_manager: Conversation to use (defaults to the pipeline's own)
+            
+        Returns:
+            WorkflowResult containing the agent's response
+        """
+        if context_manager is None:
+            context_manager = self.context_manager
+        
+        # Update context manager
+        if context:
+            self.logger.debug("Updating context with provided data")
+            context_manager.session_data.update(context)
+        
+        # Add user message to context
+        self.logger.debug("Adding user message to context")
+        context_manager.add_message("user", request)
+        
+        # Get current context for agents
+        current_context = context_manager.get_context()
+        self.logger.debug("Context contains %d messages", len(current_context.get('messages', [])))
+        
+        agent_response = await agent.execute(request, current_context)
+        
+        # Add agent response to context
+        self.logger.debug("Adding agent response to context")
+        context_manager.add_message("assistant", agent_response.content,
+                                    metadata=metadata, tool_calls=agent_response.tool_calls)
+        
+        return WorkflowResult(
+            content=agent_response.content,
+            tool_results=[],  # Tool results are now handled within the agent loop
+            agent_used=agent.name,
+            success=True
+        )
+    
     def get_context(self) -> Dict[str, Any]:
         """Get current context"""
         return self.context_manager.get_context()
@@ -244,6 +279,10 @@ class WorkflowPipeline:
         """Clear current context"""
         self.context_manager.clear_context()
     
+    async def flush_context(self):
+        """Persist any pending context changes"""
+        await self.context_manager.flush()
+    
     def get_available_agents(self) -> List[str]:
         """Get list of available agents"""
         return self.agent_registry.get_agent_names()
@@ -3,15 +3,38 @@ Mock model provider for testing and development
 """
 
 import asyncio
+import itertools
+import re
 from typing import List, Dict, Any, Optional
 from .model_manager import BaseModelProvider
 
 
+# Canned replies keyed by substrings of the lowercased user message; the first
+# entry whose pattern matches wins, so order encodes priority
+_KEYWORD_RESPONSES = tuple(
+    (re.compile('|'.join(re.escape(keyword) for keyword in keywords)), response)
+    for keywords, response in (
+        (("hello", "hi"), "Hello! I'm a mock AI assistant. I'm here to help you with your questions and tasks. How can I assist you today?"),
+        (("help",), "I'm a mock AI assistant designed for testing and development. I can simulate responses to various queries. What would you like to know?"),
+        (("who are you",), "I'm a mock AI assistant created for testing the Claude-Code-Python system. I simulate responses when no real API providers are available."),
+        (("error", "bug"), "I can help you debug issues! As a mock assistant, I can simulate various debugging scenarios. What specific error are you encountering?"),
+        (("code", "programming"), "I can help with programming questions! I can simulate code generation, debugging, and programming advice. What programming topic interests you?"),
+    )
+)
+
+
 class MockProvider(BaseModelProvider):
     """Mock provider for testing and development when no API keys are available"""
     
-    def __init__(self, name: str = "mock"):
+    def __init__(self, name: str = "mock", simulate_latency: float = 0.0):
+        """
+        Args:
+            name: Provider name
+            simulate_latency: Seconds to sleep per response to mimic a real
+                provider (0 responds immediately)
+        """
         super().__init__(name)
+        self._latency = simulate_latency
         self.responses = [
             "Hello! I'm a mock AI assistant. I can help you with various tasks.",
             "I understand you're looking for assistance. How can I help you today?",
@@ -19,7 +42,7 @@ class MockProvider(BaseModelProvider):
             "I'm here to help! What would you like to know?",
             "Great question! Here's what I think about that topic...",
         ]
-        self.response_index = 0
+        self._response_iter = itertools.cycle(self.responses)
     
     async def check_availability(self) -> bool:
         """Mock provider is always available"""
@@ -28,7 +51,8 @@ class MockProvider(BaseModelProvider):
     async def generate_response(self, messages: List[Dict[str, str]], tools: Optional[List[Dict[str, Any]]] = None, **kwargs) -> str:
         """Generate a mock response"""
         # Simulate some processing time
-        await asyncio.sleep(0.1)
+        if self._latency:
+            await asyncio.sleep(self._latency)
         
         # Get the last user message
         user_message = ""
@@ -38,21 +62,14 @@ class MockProvider(BaseModelProvider):
                 break
         
         # Generate a contextual response
-        if "hello" in user_message.lower() or "hi" in user_message.lower():
-            return "Hello! I'm a mock AI assistant. I'm here to help you with your questions and tasks. How can I assist you today?"
-        elif "help" in user_message.lower():
-            return "I'm a mock AI assistant designed for testing and development. I can simulate responses to various queries. What would you like to know?"
-        elif "who are you" in user_message.lower():
-            return "I'm a mock AI assistant created for testing the Claude-Code-Python system. I simulate responses when no real API providers are available."
-        elif "error" in user_message.lower() or "bug" in user_message.lower():
-            return "I can help you debug issues! As a mock assistant, I can simulate various debugging scenarios. What specific error are you encountering?"
-        elif "code" in user_message.lower() or "programming" in user_message.lower():
-            return "I can help with programming questions! I can simulate code generation, debugging, and programming advice. What programming topic interests you?"
-        else:
-            # Use rotating responses for other queries
-            response = self.responses[self.response_index % len(self.responses)]
-            self.response_index += 1
-            return f"{response}\n\n(Note: This is a mock response. In a real setup, you would need to configure API keys for actual AI providers.)"
+        lowered = user_message.lower()
+        for pattern, response in _KEYWORD_RESPONSES:
+            if pattern.search(lowered):
+                return response
+        
+        # Use rotating responses for other queries
+        response = next(self._response_iter)
+        return f"{response}\n\n(Note: This is a mock response. In a real setup, you would need to configure API keys for actual AI providers.)"
     
     async def shutdown(self):
         """Shutdown the mock provider"""
@@ -5,9 +5,17 @@ Model manager for handling different AI model providers
 from typing import Dict, Any, Optional, List
 from abc import ABC, abstractmethod
 import asyncio
+import logging
+import time
 from ..utils.logger import get_logger, log_function_call, log_function_result, log_error, log_performance
 
 
+# Consecutive failures after which a provider is skipped for a while
+FAILURE_THRESHOLD = 3
+# Seconds a tripped provider is skipped before it is tried again
+FAILURE_COOLDOWN = 30.0
+
+
 class BaseModelProvider(ABC):
     """Base class for model providers"""
     
@@ -38,6 +46,12 @@ class ModelManager:
         self.providers: Dict[str, BaseModelProvider] = {}
         self.default_provider = None
         self.fallback_providers: List[str] = []
+        # Names of providers whose is_available flag is currently set
+        self._available: set[str] = set()
+        # Circuit breaker state: consecutive failures per provider, and the
+        # monotonic time until which a tripped provider is skipped
+        self._failures: Dict[str, int] = {}
+        self._skip_until: Dict[str, float] = {}
         self.logger = get_logger("claude_code.model_manager")
     
     def register_provider(self, provider: BaseModelProvider, is_default: bool = False) -> None:
@@ -47,6 +61,10 @@ class ModelManager:
         
         try:
             self.providers[provider.name] = provider
+            if provider.is_available:
+                self._available.add(provider.name)
+            else:
+                self._available.discard(provider.name)
             if is_default:
                 self.default_provider = provider.name
                 self.logger.info(f"Registered {provider.name} as default provider")
@@ -64,51 +82,78 @@ class ModelManager:
         self.fallback_providers = provider_names
     
     async def initialize_providers(self) -> None:
-        """Initialize all registered providers"""
-        for name, provider in self.providers.items():
-            try:
-                provider.is_available = await provider.check_availability()
-            except Exception as e:
-                provider.is_available = False
-                # Don't print error for mock provider as it's expected to work
-                if name != "mock":
-                    print(f"⚠️  Provider {name} initialization failed: {e}")
+        """Initialize all registered providers concurrently"""
+        await asyncio.gather(
+            *(self._probe(name, provider) for name, provider in self.providers.items()),
+            return_exceptions=True
+        )
+    
+    async def _probe(self, name: str, provider: BaseModelProvider) -> None:
+        """Check one provider's availability, marking it unavailable on failure"""
+        try:
+            provider.is_available = await provider.check_availability()
+        except Exception as e:
+            provider.is_available = False
+            # The mock provider is expected to work, so its failures only matter when debugging
+            level = logging.DEBUG if name == "mock" else logging.WARNING
+            self.logger.log(level, "Provider %s initialization failed: %s", name, e)
+        if provider.is_available:
+            self._available.add(name)
+        else:
+            self._available.discard(name)
+    
+    def record_failure(self, provider_name: str) -> None:
+        """
+        Count a failed call, skipping the provider for FAILURE_COOLDOWN seconds
+        once it has failed FAILURE_THRESHOLD times in a row
+        
+        A single error (a transient 503, a bad request) never takes a provider
+        out of rotation; after the cooldown it is tried again.
+        """
+        failures = self._failures.get(provider_name, 0) + 1
+        self._failures[provider_name] = failures
+        if failures >= FAILURE_THRESHOLD:
+            self._skip_until[provider_name] = time.monotonic() + FAILURE_COOLDOWN
+            self.logger.warning("Provider %s failed %d times in a row; skipping it for %.0fs",
+                                provider_name, failures, FAILURE_COOLDOWN)
+    
+    def record_success(self, provider_name: str) -> None:
+        """Reset a provider's failure count after a successful call"""
+        if self._failures.pop(provider_name, None) is not None:
+            self._skip_until.pop(provider_name, None)
     
     async def generate_response(
         self, 
         messages: List[Dict[str, str]], 
         provider_name: Optional[str] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
+        hedge: bool = False,
         **kwargs
     ) -> str:
-        """Generate response using specified or default provider"""
-        # Try specified provider first
-        if provider_name and provider_name in self.providers:
-            provider = self.providers[provider_name]
-            if provider.is_available:
-                try:
-                    return await provider.generate_response(messages, tools=tools, **kwargs)
-                except Exception as e:
-                    print(f"Error with provider {provider_name}: {e}")
+        """
+        Generate response using specified or default provider
         
-        # Try default provider
-        if self.default_provider and self.default_provider in self.providers:
-            provider = self.providers[self.default_provider]
-            if provider.is_available:
-                try:
-                    return await provider.generate_response(messages, tools=tools, **kwargs)
-                except Exception as e:
-                    print(f"Error with default provider {self.default_provider}: {e}")
+        With ``hedge`` set, the first two candidates are queried concurrently
+        and the first successful response wins. This trades extra API calls
+        for lower tail latency, so it is off by default.
+        """
+        # Try specified provider first, then the default, then fallbacks
+        candidates = self._candidate_providers(provider_name)
+        if hedge and len(candidates) >= 2:
+            try:
+                return await self._hedged_response(candidates[:2], messages, tools, **kwargs)
+            except Exception:
+                candidates = candidates[2:]
         
-        # Try fallback providers
-        for fallback_name in self.fallback_providers:
-            if fallback_name in self.providers:
-                provider = self.providers[fallback_name]
-                if provider.is_available:
-                    try:
-                        return await provider.generate_response(messages, tools=tools, **kwargs)
-                    except Exception as e:
-                        print(f"Error with fallback provider {fallback_name}: {e}")
+        for provider in candidates:
+            try:
+                response = await provider.generate_response(messages, tools=tools, **kwargs)
+            except Exception as e:
+                self.logger.warning("Provider %s failed: %s", provider.name, e)
+                self.record_failure(provider.name)
+                continue
+            self.record_success(provider.name)
+            return response
         
         available_providers = self.get_available_providers()
         if not available_providers:
@@ -116,12 +161,61 @@ class ModelManager:
         else:
             raise Exception(f"No available model providers. Registered providers: {list(self.providers.keys())}, Available: {available_providers}")
     
+    async def _hedged_response(
+        self,
+        providers: List[BaseModelProvider],
+        messages: List[Dict[str, str]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        **kwargs
+    ) -> str:
+        """Race providers and return the first success, re-raising the last error if all fail"""
+        tasks = {
+            asyncio.create_task(provider.generate_response(messages, tools=tools, **kwargs)): provider
+            for provider in providers
+        }
+        error: Optional[Exception] = None
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = tasks[task]
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        self.logger.warning("Provider %s failed: %s", provider.name, e)
+                        self.record_failure(provider.name)
+                        error = e
+                        continue
+                    self.record_success(provider.name)
+                    return response
+            raise error
+        finally:
+            # Cancel whichever request lost the race
+            for task in tasks:
+                task.cancel()
+    
+    def _candidate_providers(self, provider_name: Optional[str] = None) -> List[BaseModelProvider]:
+        """
+        Available providers in the order they should be tried, without duplicates
+        
+        Providers whose circuit breaker tripped are left out until their
+        cooldown ends.
+        """
+        seen = set()
+        candidates = []
+        now = time.monotonic()
+        for name in (provider_name, self.default_provider, *self.fallback_providers):
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            if name in self._available and self._skip_until.get(name, 0.0) <= now:
+                candidates.append(self.providers[name])
+        return candidates
+    
     def get_available_providers(self) -> List[str]:
-        """Get list of available providers"""
-        return [
-            name for name, provider in self.providers.items() 
-            if provider.is_available
-        ]
+        """Get list of available providers, in registration order"""
+        return [name for name in self.providers if name in self._available]
     
     def get_provider_info(self, provider_name: str) -> Optional[Dict[str, Any]]:
         """Get information about a provider"""
@@ -2,30 +2,128 @@
 openrouter model provider
 """
 
+import asyncio
+import functools
+import hashlib
+import importlib.util
+import itertools
 import os
 import json
-from typing import List, Dict, Any, Optional
+import logging
+from collections import OrderedDict
+from typing import AsyncIterator, ClassVar, List, Dict, Any, Optional, Tuple
 from .model_manager import BaseModelProvider
-from openai import OpenAI
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionMessageToolCall
 from dotenv import load_dotenv
 from ..utils.logger import get_logger
+
+try:
+    import httpx
+except ImportError:  # openai releases built on another HTTP stack
+    httpx = None
+
 load_dotenv()
 
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Call options handled explicitly rather than passed through to the API
+_RESERVED_KWARGS = frozenset({"max_tokens", "temperature", "tools"})
+
+# HTTP/2 multiplexing needs the optional h2 package
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _build_http_client():
+    """Build an HTTP client that keeps connections to OpenRouter alive between calls"""
+    if httpx is None:
+        return None
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=256, max_keepalive_connections=128, keepalive_expiry=60.0),
+        timeout=httpx.Timeout(120.0, connect=10.0),
+        http2=_HTTP2_AVAILABLE,
+    )
+
+
 class OpenRouterProvider(BaseModelProvider):
     """Provider for models via OpenRouter"""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "moonshotai/kimi-k2-0905"):
+    # Clients (and their connection pools) shared by providers using the same
+    # endpoint and API key, with the number of providers holding each one
+    _shared_clients: ClassVar[Dict[Tuple[str, str], AsyncOpenAI]] = {}
+    _client_refs: ClassVar[Dict[Tuple[str, str], int]] = {}
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "moonshotai/kimi-k2-0905",
+                 api_keys: Optional[List[str]] = None):
+        """
+        Args:
+            api_key: OpenRouter API key (defaults to OPENROUTER_API_KEY)
+            model: Model to request
+            api_keys: Several API keys to spread requests over round-robin,
+                since OpenRouter rate-limits per key (defaults to the
+                comma-separated OPENROUTER_API_KEYS, then to api_key)
+        """
         super().__init__("openrouter")
-        self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+        if api_keys is None and not api_key:
+            api_keys = [key.strip() for key in os.getenv("OPENROUTER_API_KEYS", "").split(",") if key.strip()]
+        if not api_keys:
+            api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+            api_keys = [api_key] if api_key else []
+        self.api_keys: List[str] = list(dict.fromkeys(api_keys))
+        self.api_key = self.api_keys[0] if self.api_keys else None
         self.model = model
         self.client = None
+        self._clients: List[AsyncOpenAI] = []
         self.logger = get_logger("claude_code.openrouter")
         
-        if self.api_key:
-            self.client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=self.api_key,
+        # LRU of deterministic (temperature <= 0) completions keyed by request hash
+        self.cache_size = 1024
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # cache key -> request currently in flight for it
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        
+        if self.api_keys:
+            self._clients = [self._acquire_client((OPENROUTER_BASE_URL, key)) for key in self.api_keys]
+            self.client = self._clients[0]
+        self._client_cycle = itertools.cycle(self._clients)
+    
+    @classmethod
+    def _acquire_client(cls, key: Tuple[str, str]) -> AsyncOpenAI:
+        """Get the shared client for an endpoint/API key pair, creating it on first use"""
+        client = cls._shared_clients.get(key)
+        if client is None:
+            base_url, api_key = key
+            client = AsyncOpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                http_client=_build_http_client(),
+                # The SDK retries 408/409/429/5xx and connection errors with
+                # jittered exponential backoff, honoring Retry-After
+                max_retries=5,
             )
+            cls._shared_clients[key] = client
+        cls._client_refs[key] = cls._client_refs.get(key, 0) + 1
+        return client
+    
+    @classmethod
+    async def _release_client(cls, key: Tuple[str, str]):
+        """Drop one reference to a shared client, closing it when none remain"""
+        refs = cls._client_refs.get(key, 1) - 1
+        if refs > 0:
+            cls._client_refs[key] = refs
+            return
+        cls._client_refs.pop(key, None)
+        client = cls._shared_clients.pop(key, None)
+        if client is not None:
+            await client.close()
+    
+    def _next_client(self) -> AsyncOpenAI:
+        """Pick the client for the next request, rotating across API keys"""
+        if len(self._clients) == 1:
+            return self.client
+        return next(self._client_cycle)
     
     async def check_availability(self) -> bool:
         """Check if OpenRouter provider is available"""
@@ -36,7 +134,7 @@ class OpenRouterProvider(BaseModelProvider):
         try:
             # Test with a simple request
             self.logger.info("Testing OpenRouter API availability")
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[{"role": "user", "content": "Hello"}],
                 max_tokens=10
@@ -52,72 +150,212 @@ class OpenRouterProvider(BaseModelProvider):
         if not self.client:
             raise Exception("OpenRouter provider not initialized")
         
-        # Convert messages to OpenAI format
-        openai_messages = []
-        for msg in messages:
-            message_dict = {
-                "role": msg["role"],
-                "content": msg["content"]
-            }
-            # Add tool_calls if present (for assistant messages)
-            if "tool_calls" in msg and msg["tool_calls"]:
-                message_dict["tool_calls"] = msg["tool_calls"]
-            openai_messages.append(message_dict)
-        
-        # Set default parameters
-        params = {
-            "model": self.model,
-            "messages": openai_messages,
-            "max_tokens": kwargs.get("max_tokens", 10000),
-            "temperature": kwargs.get("temperature", 0.7),
-        }
+        params = self._build_params(messages, tools, kwargs)
         
-        # Add tools if provided
-        if tools:
-            params["tools"] = tools
+        # Only deterministic requests are safe to answer from the cache
+        cache_key = None
+        temperature = params["temperature"]
+        if self.cache_size > 0 and temperature is not None and temperature <= 0.0:
+            cache_key = hashlib.sha256(
+                json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode()
+            ).hexdigest()
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                self._cache_hits += 1
+                self.logger.info("OpenRouter API Request served from cache")
+                return dict(cached) if isinstance(cached, dict) else cached
+            self._cache_misses += 1
         
-        # Add any additional parameters
-        for key, value in kwargs.items():
-            if key not in ["max_tokens", "temperature", "tools"]:
-                params[key] = value
+        if cache_key is None:
+            return await self._complete(params)
         
-        # Log the request details
-        self.logger.info(f"OpenRouter API Request - Model: {self.model}")
-        self.logger.info(f"OpenRouter API Request - Messages: {json.dumps(openai_messages, indent=2, ensure_ascii=False)}")
-        self.logger.info(f"OpenRouter API Request - Parameters: {json.dumps({k: v for k, v in params.items() if k not in ['messages', 'tools']}, indent=2, ensure_ascii=False)}")
+        # Identical deterministic requests already in flight share one upstream call
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._complete(params, cache_key))
+            self._inflight[cache_key] = task
+            task.add_done_callback(functools.partial(self._finish_inflight, cache_key))
+        # Shielded so one caller being cancelled doesn't cancel the others' request
+        result = await asyncio.shield(task)
+        return dict(result) if isinstance(result, dict) else result
+    
+    async def _complete(self, params: Dict[str, Any], cache_key: Optional[str] = None) -> Any:
+        """Send one chat completion request, caching the result under cache_key if given"""
+        # Log the request details; payload dumps scale with the context, so only at DEBUG
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+        self.logger.info("OpenRouter API Request - Model: %s", self.model)
+        if debug_enabled:
+            self.logger.debug("OpenRouter API Request - Messages: %s",
+                              json.dumps(params["messages"], ensure_ascii=False, default=str))
+            self.logger.debug("OpenRouter API Request - Parameters: %s",
+                              json.dumps({k: v for k, v in params.items() if k not in ['messages', 'tools']},
+                                         ensure_ascii=False, default=str))
         
         try:
-            response = self.client.chat.completions.create(**params)
+            response = await self._next_client().chat.completions.create(**params)
             
             # Log the response details
             message = response.choices[0].message
-            self.logger.info(f"OpenRouter API Response - Content: {message.content or ''}")
-            self.logger.info(f"OpenRouter API Response - Finish Reason: {response.choices[0].finish_reason}")
+            self.logger.info("OpenRouter API Response - Finish Reason: %s", response.choices[0].finish_reason)
+            if debug_enabled:
+                self.logger.debug("OpenRouter API Response - Content: %s", message.content or '')
             
             if hasattr(message, 'tool_calls') and message.tool_calls:
-                tool_calls_data = [{
-                    'id': tc.id,
-                    'type': tc.type,
-                    'function': {
-                        'name': tc.function.name,
-                        'arguments': tc.function.arguments
-                    }
-                } for tc in message.tool_calls]
-                self.logger.info(f"OpenRouter API Response - Tool Calls: {json.dumps(tool_calls_data, indent=2, ensure_ascii=False)}")
+                if debug_enabled:
+                    tool_calls_data = [{
+                        'id': tc.id,
+                        'type': tc.type,
+                        'function': {
+                            'name': tc.function.name,
+                            'arguments': tc.function.arguments
+                        }
+                    } for tc in message.tool_calls]
+                    self.logger.debug("OpenRouter API Response - Tool Calls: %s",
+                                      json.dumps(tool_calls_data, ensure_ascii=False))
                 # Return the raw response for tool calling
-                return {
+                result = {
                     "content": message.content or "",
                     "tool_calls": message.tool_calls,
                     "finish_reason": response.choices[0].finish_reason
                 }
             else:
                 # Return just the content for regular responses
-                return message.content or ""
+                result = message.content or ""
+            
+            if cache_key is not None:
+                self._store_cached(cache_key, result)
+            return result
                 
         except Exception as e:
             self.logger.error(f"OpenRouter API Error: {str(e)}")
             raise Exception(f"Error generating response with OpenRouter: {str(e)}")
     
+    def _finish_inflight(self, cache_key: str, task: "asyncio.Future[Any]"):
+        """Forget a finished in-flight request"""
+        self._inflight.pop(cache_key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller was cancelled
+    
+    async def stream_response(self, messages: List[Dict[str, str]], tools: Optional[List[Dict[str, Any]]] = None, **kwargs) -> AsyncIterator[Any]:
+        """
+        Stream a response from OpenRouter as it is generated
+        
+        Yields content fragments (str) as they arrive. If the model calls
+        tools, a final dict with "content", "tool_calls" and "finish_reason"
+        (the shape generate_response returns for tool calls) is yielded once
+        the stream ends.
+        """
+        if not self.client:
+            raise Exception("OpenRouter provider not initialized")
+        
+        params = self._build_params(messages, tools, kwargs)
+        params["stream"] = True
+        
+        content_parts: List[str] = []
+        tool_calls: Dict[int, Dict[str, Any]] = {}  # index -> accumulated tool call
+        finish_reason = None
+        try:
+            stream = await self._next_client().chat.completions.create(**params)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                delta = choice.delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                    yield delta.content
+                # Tool calls arrive as fragments that share an index
+                for tc in delta.tool_calls or ():
+                    entry = tool_calls.setdefault(tc.index, {
+                        "id": "",
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""}
+                    })
+                    if tc.id:
+                        entry["id"] = tc.id
+                    if tc.function:
+                        if tc.function.name:
+                            entry["function"]["name"] += tc.function.name
+                        if tc.function.arguments:
+                            entry["function"]["arguments"] += tc.function.arguments
+        except Exception as e:
+            self.logger.error(f"OpenRouter API Error: {str(e)}")
+            raise Exception(f"Error streaming response with OpenRouter: {str(e)}")
+        
+        if tool_calls:
+            yield {
+                "content": "".join(content_parts),
+                "tool_calls": [ChatCompletionMessageToolCall(**tool_calls[index]) for index in sorted(tool_calls)],
+                "finish_reason": finish_reason
+            }
+    
+    def _build_params(self, messages: List[Dict[str, str]], tools: Optional[List[Dict[str, Any]]],
+                      kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Build chat completion parameters from agent messages and call options"""
+        # Convert messages to OpenAI format, keeping tool_calls on assistant messages that have them
+        openai_messages = [
+            {"role": msg["role"], "content": msg["content"], "tool_calls": msg["tool_calls"]}
+            if msg.get("tool_calls") else
+            {"role": msg["role"], "content": msg["content"]}
+            for msg in messages
+        ]
+        
+        # Defaults, tools if provided, then any additional parameters
+        return {
+            "model": self.model,
+            "messages": openai_messages,
+            "max_tokens": kwargs.get("max_tokens", 10000),
+            "temperature": kwargs.get("temperature", 0.7),
+            **({"tools": tools} if tools else {}),
+            **{key: value for key, value in kwargs.items() if key not in _RESERVED_KWARGS},
+        }
+    
+    async def generate_batch(self, batch: List[List[Dict[str, str]]], *, max_concurrency: int = 16,
+                             tools: Optional[List[Dict[str, Any]]] = None, **kwargs) -> List[Any]:
+        """
+        Generate responses for several independent conversations concurrently
+        
+        Args:
+            batch: One message list per request
+            max_concurrency: Maximum number of requests in flight at once
+            tools: Optional tools offered to every request
+            
+        Returns:
+            Responses in the same order as the batch; a failed request yields
+            its exception instead of a response
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _generate_one(messages: List[Dict[str, str]]) -> Any:
+            async with semaphore:
+                return await self.generate_response(messages, tools=tools, **kwargs)
+        
+        return list(await asyncio.gather(*(_generate_one(messages) for messages in batch),
+                                         return_exceptions=True))
+    
+    def _store_cached(self, key: str, result: Any):
+        """Remember a completion, evicting the least recently used entry"""
+        self._cache[key] = dict(result) if isinstance(result, dict) else result
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Get completion cache hit/miss counters"""
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "size": len(self._cache)
+        }
+    
     async def shutdown(self):
-        """Shutdown the provider"""
+        """Shutdown the provider, closing shared clients once no provider uses them"""
+        if self._clients:
+            for key in self.api_keys:
+                await self._release_client((OPENROUTER_BASE_URL, key))
+        self._clients = []
+        self._client_cycle = itertools.cycle(self._clients)
         self.client = None
@@ -3,9 +3,39 @@ BashOutput tool for retrieving output from background bash sessions
 """
 
 import re
+from collections import deque
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from .base_tool import BaseTool
 
+try:
+    import re2  # google-re2: linear-time matching, immune to catastrophic backtracking
+except ImportError:
+    re2 = None
+
+
+@lru_cache(maxsize=256)
+def _compile_filter(pattern: str):
+    """
+    Compile (and memoize) an output filter pattern
+    
+    Uses RE2 when it is installed, falling back to ``re`` for patterns RE2
+    does not support (backreferences, lookaround).
+    """
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern)
+
+
+def _matching_lines(pattern, text: str) -> str:
+    """Keep the lines of text that match pattern"""
+    # filter() drives pattern.search from C instead of a Python-level loop
+    # (module level, since execute()'s ``filter`` argument shadows the builtin)
+    return '\n'.join(filter(pattern.search, text.split('\n')))
+
 
 class BashOutputTool(BaseTool):
     """Tool for retrieving output from background bash sessions"""
@@ -52,23 +82,27 @@ class BashOutputTool(BaseTool):
                     "result": None
                 }
             
-            # Get the shell output
             shell_info = self.shell_outputs[bash_id]
-            output = shell_info.get("output", "")
             
-            # Apply filter if specified
+            pattern = None
             if filter:
                 try:
-                    pattern = re.compile(filter)
-                    lines = output.split('\n')
-                    filtered_lines = [line for line in lines if pattern.search(line)]
-                    output = '\n'.join(filtered_lines)
+                    pattern = _compile_filter(filter)
                 except re.error as e:
                     return {
                         "error": f"Invalid regex pattern: {str(e)}",
                         "result": None
                     }
             
+            # Only return output produced since the last check
+            chunks = shell_info["chunks"]
+            output = ''.join(chunks)
+            chunks.clear()
+            
+            # Apply filter if specified
+            if pattern is not None:
+                output = _matching_lines(pattern, output)
+            
             # Check if shell is still running
             is_running = shell_info.get("running", False)
             
@@ -90,7 +124,8 @@ class BashOutputTool(BaseTool):
     def register_shell(self, bash_id: str, output: str = "", running: bool = True, return_code: Optional[int] = None):
         """Register a shell session for output tracking"""
         self.shell_outputs[bash_id] = {
-            "output": output,
+            # Output not yet returned; appending a chunk is O(1) however long the shell runs
+            "chunks": deque([output] if output else []),
             "running": running,
             "return_code": return_code
         }
@@ -98,5 +133,5 @@ class BashOutputTool(BaseTool):
     def update_shell_output(self, bash_id: str, new_output: str):
         """Update the output for a shell session"""
         if bash_id in self.shell_outputs:
-            self.shell_outputs[bash_id]["output"] += new_output
+            self.shell_outputs[bash_id]["chunks"].append(new_output)
 
@@ -3,11 +3,191 @@ Bash tool for executing shell commands
 """
 
 import asyncio
-import subprocess
 import os
-from typing import Dict, Any, Optional
+import shlex
+import shutil
+import signal
+import subprocess
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
 from .base_tool import BaseTool
 
+# Characters of command output returned before truncating
+OUTPUT_LIMIT = 30000
+_STDERR_SEPARATOR = "\nSTDERR:\n"
+
+
+# UTF-8 needs at most 4 bytes per character, so this many bytes always
+# decode to at least OUTPUT_LIMIT characters
+_OUTPUT_BYTE_CAP = OUTPUT_LIMIT * 4
+
+# Background sessions kept before the oldest finished ones are dropped
+MAX_BACKGROUND_SESSIONS = 64
+
+# Seconds a timed-out command gets to exit after SIGTERM before SIGKILL
+TERMINATE_GRACE = 1.0
+
+# Start each shell as the leader of its own process group so a timeout can
+# signal everything it spawned
+if os.name == "nt":
+    _NEW_GROUP = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    _NEW_GROUP = {"start_new_session": True}
+
+# Shell kept alive between commands; without bash every command gets a fresh
+# shell from create_subprocess_shell, so cd and exports don't carry over
+_BASH = shutil.which("bash")
+
+# Prints the shell's working directory and exported variables, NUL-separated
+# (in a subshell so the loop variable doesn't leak into the session)
+_STATE_COMMAND = ('( printf \'%s\\0\' "$PWD"; for name in $(compgen -e); do '
+                  'printf \'%s=%s\\0\' "$name" "${!name}"; done )')
+
+
+def _decode_head(data: bytes, limit: int, discarded: bool = False) -> Tuple[str, bool]:
+    """
+    Decode at most ``limit`` characters from the start of ``data``
+    
+    Args:
+        data: Raw output
+        limit: Maximum number of characters to decode
+        discarded: Whether bytes after ``data`` were already dropped
+    
+    Returns:
+        Tuple of (text, whether anything was cut off)
+    """
+    head = data[:limit * 4].decode(errors="replace")
+    if discarded or len(head) > limit or len(data) > limit * 4:
+        return head[:limit], True
+    return head, False
+
+
+async def _read_capped(stream: asyncio.StreamReader, cap: int) -> Tuple[bytes, bool]:
+    """
+    Read a stream to EOF, keeping only its first ``cap`` bytes
+    
+    The rest is read and dropped so the child never blocks on a full pipe.
+    
+    Returns:
+        Tuple of (kept bytes, whether anything was dropped)
+    """
+    head = bytearray()
+    discarded = False
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        room = cap - len(head)
+        if room > 0:
+            head += chunk[:room]
+        if len(chunk) > max(room, 0):
+            discarded = True
+    return bytes(head), discarded
+
+
+async def _read_until_marker(stream: asyncio.StreamReader, marker: bytes,
+                             cap: int) -> Tuple[bytes, bool, Optional[bytes]]:
+    """
+    Read a stream up to ``marker``, keeping only the first ``cap`` bytes before it
+    
+    Returns:
+        Tuple of (kept bytes, whether anything was dropped, the rest of the
+        marker's line or None if the stream ended before the marker)
+    """
+    head = bytearray()
+    discarded = False
+    pending = b""
+    suffix = None
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            data = pending
+            break
+        pending += chunk
+        index = pending.find(marker)
+        if index >= 0:
+            data = pending[:index]
+            suffix = pending[index + len(marker):]
+            if b"\n" not in suffix:
+                suffix += await stream.readline()
+            # Anything after the line is late output of background jobs
+            suffix = suffix.split(b"\n", 1)[0]
+            break
+        # Hold back a possible partial marker at the end of the chunk
+        split = max(len(pending) - len(marker) + 1, 0)
+        data, pending = pending[:split], pending[split:]
+        room = cap - len(head)
+        if room > 0:
+            head += data[:room]
+        if len(data) > max(room, 0):
+            discarded = True
+    room = cap - len(head)
+    if room > 0:
+        head += data[:room]
+    if len(data) > max(room, 0):
+        discarded = True
+    return bytes(head), discarded, suffix
+
+
+def _format_output(stdout: bytes, stdout_discarded: bool, stderr: bytes, stderr_discarded: bool) -> str:
+    """Join a command's stdout and stderr, truncated to OUTPUT_LIMIT characters"""
+    # Truncate stdout and stderr before joining them so large outputs are
+    # never decoded or copied in full
+    output, truncated = _decode_head(stdout, OUTPUT_LIMIT, stdout_discarded)
+    if stderr and not truncated:
+        room = OUTPUT_LIMIT - len(output)
+        error_output, truncated = _decode_head(stderr, max(room - len(_STDERR_SEPARATOR), 0),
+                                               stderr_discarded)
+        tail = _STDERR_SEPARATOR + error_output
+        truncated = truncated or len(tail) > room
+        output += tail[:room]
+    elif stderr:
+        truncated = True
+    
+    if truncated:
+        output += "\n... (output truncated)"
+    return output
+
+
+def _signal_group(process: asyncio.subprocess.Process, sig: int):
+    """Send a signal to a process group, ignoring one that already exited"""
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+async def _terminate_process_group(process: asyncio.subprocess.Process):
+    """
+    Stop a shell started in its own process group, along with its children
+    
+    The group gets SIGTERM (CTRL_BREAK_EVENT on Windows) so commands can
+    clean up, then SIGKILL (or kill()) for anything still running after
+    TERMINATE_GRACE seconds. Killing only the shell would leave commands it
+    started holding the output pipes open, and waiting on the shell would
+    block until they exit.
+    """
+    if os.name == "nt":
+        try:
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+            await asyncio.wait_for(process.wait(), TERMINATE_GRACE)
+        except (ProcessLookupError, asyncio.TimeoutError):
+            pass
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+        return
+    
+    _signal_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), TERMINATE_GRACE)
+    except asyncio.TimeoutError:
+        pass
+    # Also catches children that ignored SIGTERM after the shell exited
+    _signal_group(process, signal.SIGKILL)
+    await process.wait()
+
 
 class BashTool(BaseTool):
     """Tool for executing bash commands"""
@@ -41,8 +221,11 @@ class BashTool(BaseTool):
                 "$schema": "http://json-schema.org/draft-07/schema#"
             }
         )
-        self.shell_sessions = {}
+        self.shell_sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.next_session_id = 1
+        # Long-lived bash that keeps cwd and environment between commands
+        self._shell: Optional[asyncio.subprocess.Process] = None
+        self._shell_lock = asyncio.Lock()
     
     async def execute(self, command: str, timeout: Optional[int] = None, 
                      description: Optional[str] = None, run_in_background: bool = False) -> Dict[str, Any]:
@@ -60,26 +243,29 @@ class BashTool(BaseTool):
         # Convert timeout to seconds
         timeout_seconds = min(timeout, 600000) / 1000  # Max 10 minutes
         
+        self._reap()
+        
         try:
             if run_in_background:
                 # Run in background
                 session_id = str(self.next_session_id)
                 self.next_session_id += 1
                 
-                # Start background process
-                process = subprocess.Popen(
+                # Start background process where the foreground shell is
+                cwd, env = await self._shell_state()
+                process = await asyncio.create_subprocess_shell(
                     command,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    cwd=os.getcwd()
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd,
+                    env=env
                 )
                 
                 self.shell_sessions[session_id] = {
                     "process": process,
                     "command": command,
-                    "description": description or "Background command"
+                    "description": description or "Background command",
+                    "delivered": False
                 }
                 
                 return {
@@ -89,32 +275,19 @@ class BashTool(BaseTool):
                     "command": command
                 }
             else:
-                # Run synchronously
-                result = subprocess.run(
-                    command,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout_seconds,
-                    cwd=os.getcwd()
-                )
-                
-                output = result.stdout
-                if result.stderr:
-                    output += f"\nSTDERR:\n{result.stderr}"
-                
-                # Truncate if too long
-                if len(output) > 30000:
-                    output = output[:30000] + "\n... (output truncated)"
+                if _BASH is not None:
+                    output, return_code = await self._run_in_shell(command, timeout_seconds)
+                else:
+                    output, return_code = await self._run_once(command, timeout_seconds)
                 
                 return {
                     "error": None,
                     "result": output,
-                    "return_code": result.returncode,
+                    "return_code": return_code,
                     "command": command
                 }
                 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             return {
                 "error": f"Command timed out after {timeout_seconds} seconds",
                 "result": None
@@ -125,20 +298,195 @@ class BashTool(BaseTool):
                 "result": None
             }
     
+    async def _run_in_shell(self, command: str, timeout_seconds: float) -> Tuple[str, int]:
+        """
+        Run a command in the persistent shell, so cd and exports carry over
+        
+        Returns:
+            Tuple of (formatted output, return code)
+        """
+        stdout, stdout_discarded, stderr, stderr_discarded, return_code = await self._exec_in_shell(
+            command, timeout_seconds
+        )
+        return _format_output(stdout, stdout_discarded, stderr, stderr_discarded), return_code
+    
+    async def _exec_in_shell(self, command: str,
+                             timeout_seconds: float) -> Tuple[bytes, bool, bytes, bool, int]:
+        """
+        Run a command in the persistent shell, starting it if needed
+        
+        The command is eval'd with stdin from /dev/null, then a per-call
+        marker is printed on both pipes (with the exit status on stdout) to
+        delimit its output. Output that jobs the shell left in the background
+        wrote since the previous command is drained first, up to a fresh
+        marker, so it isn't attributed to this one. A timeout or cancellation
+        kills the shell and its children; the next command starts a fresh one.
+        
+        Returns:
+            Tuple of (stdout, whether stdout was cut, stderr, whether stderr
+            was cut, return code)
+        """
+        async with self._shell_lock:
+            shell = self._shell
+            if shell is None or shell.returncode is not None:
+                shell = self._shell = await asyncio.create_subprocess_exec(
+                    _BASH, "--noprofile", "--norc",
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=os.getcwd(),
+                    **_NEW_GROUP
+                )
+                fresh = True
+            else:
+                fresh = False
+            
+            marker = f"__BASH_TOOL_{uuid.uuid4().hex}__"
+            try:
+                if not fresh:
+                    sync_marker = f"__BASH_TOOL_{uuid.uuid4().hex}__"
+                    shell.stdin.write(
+                        f"printf '%s\\n' {sync_marker}\n"
+                        f"printf '%s\\n' {sync_marker} >&2\n".encode()
+                    )
+                    await shell.stdin.drain()
+                    await asyncio.wait_for(
+                        asyncio.gather(
+                            _read_until_marker(shell.stdout, sync_marker.encode(), 0),
+                            _read_until_marker(shell.stderr, sync_marker.encode(), 0)
+                        ),
+                        timeout=timeout_seconds
+                    )
+                
+                shell.stdin.write(
+                    f"eval {shlex.quote(command)} < /dev/null\n"
+                    f"printf '%s%d\\n' {marker} \"$?\"\n"
+                    f"printf '%s\\n' {marker} >&2\n".encode()
+                )
+                await shell.stdin.drain()
+                (stdout, stdout_discarded, status), (stderr, stderr_discarded, _) = await asyncio.wait_for(
+                    asyncio.gather(
+                        _read_until_marker(shell.stdout, marker.encode(), _OUTPUT_BYTE_CAP),
+                        _read_until_marker(shell.stderr, marker.encode(), _OUTPUT_BYTE_CAP)
+                    ),
+                    timeout=timeout_seconds
+                )
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # Unread output would otherwise end up in the next command's
+                await _terminate_process_group(shell)
+                self._shell = None
+                raise
+            
+            if status is None:
+                # The command ended the shell itself (e.g. `exit 3`)
+                return_code = await shell.wait()
+                self._shell = None
+            else:
+                return_code = int(status)
+        
+        return stdout, stdout_discarded, stderr, stderr_discarded, return_code
+    
+    async def _shell_state(self) -> Tuple[str, Optional[Dict[str, str]]]:
+        """
+        Working directory and exported environment of the persistent shell
+        
+        Returns:
+            Tuple of (cwd, env). Without a running shell (or if its state
+            can't be read) this is the current directory and None, i.e. this
+            process's environment.
+        """
+        shell = self._shell
+        if shell is None or shell.returncode is not None:
+            return os.getcwd(), None
+        try:
+            stdout, discarded, _, _, return_code = await self._exec_in_shell(_STATE_COMMAND, 5.0)
+        except asyncio.TimeoutError:
+            return os.getcwd(), None
+        cwd, *variables = stdout.decode(errors="surrogateescape").split("\0")
+        env = dict(variable.split("=", 1) for variable in variables if "=" in variable)
+        if discarded or return_code != 0 or not cwd or not env:
+            return os.getcwd(), None
+        return cwd, env
+    
+    async def shutdown(self):
+        """Stop the persistent shell; background sessions keep running"""
+        async with self._shell_lock:
+            shell, self._shell = self._shell, None
+            if shell is None or shell.returncode is not None:
+                return
+            # bash exits at end of input; anything still holding it up is killed
+            shell.stdin.close()
+            try:
+                await asyncio.wait_for(shell.wait(), TERMINATE_GRACE)
+            except asyncio.TimeoutError:
+                await _terminate_process_group(shell)
+    
+    async def _run_once(self, command: str, timeout_seconds: float) -> Tuple[str, int]:
+        """
+        Run a command in a fresh shell of its own
+        
+        Used when bash is not available. Each call starts in the current
+        directory with this process's environment, so cd and exports made by
+        one command do not carry over to the next.
+        
+        Returns:
+            Tuple of (formatted output, return code)
+        """
+        # Wait for the command without blocking the event loop
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=os.getcwd(),
+            **_NEW_GROUP
+        )
+        try:
+            # Drain both pipes concurrently, holding at most the bytes that can be returned
+            (stdout, stdout_discarded), (stderr, stderr_discarded), _ = await asyncio.wait_for(
+                asyncio.gather(
+                    _read_capped(process.stdout, _OUTPUT_BYTE_CAP),
+                    _read_capped(process.stderr, _OUTPUT_BYTE_CAP),
+                    process.wait()
+                ),
+                timeout=timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            await _terminate_process_group(process)
+            raise
+        
+        return _format_output(stdout, stdout_discarded, stderr, stderr_discarded), process.returncode
+    
+    def _reap(self):
+        """
+        Drop finished background sessions that are no longer needed
+        
+        Sessions whose output was already delivered are always dropped; past
+        MAX_BACKGROUND_SESSIONS the oldest finished ones go too. Running
+        sessions are never dropped.
+        """
+        excess = len(self.shell_sessions) - MAX_BACKGROUND_SESSIONS
+        for session_id, session_info in list(self.shell_sessions.items()):
+            if session_info["process"].returncode is None:
+                continue
+            if session_info["delivered"] or excess > 0:
+                del self.shell_sessions[session_id]
+                excess -= 1
+    
     def get_background_sessions(self) -> Dict[str, Any]:
         """Get information about background sessions"""
+        self._reap()
         sessions = {}
         for session_id, session_info in self.shell_sessions.items():
             process = session_info["process"]
             sessions[session_id] = {
                 "command": session_info["command"],
                 "description": session_info["description"],
-                "running": process.poll() is None,
+                "running": process.returncode is None,
                 "return_code": process.returncode
             }
         return sessions
     
-    def get_background_output(self, session_id: str) -> Dict[str, Any]:
+    async def get_background_output(self, session_id: str) -> Dict[str, Any]:
         """Get output from a background session"""
         if session_id not in self.shell_sessions:
             return {
@@ -149,7 +497,7 @@ class BashTool(BaseTool):
         session = self.shell_sessions[session_id]
         process = session["process"]
         
-        if process.poll() is None:
+        if process.returncode is None:
             # Still running
             return {
                 "error": None,
@@ -158,10 +506,11 @@ class BashTool(BaseTool):
             }
         else:
             # Finished
-            stdout, stderr = process.communicate()
-            output = stdout
+            stdout, stderr = await process.communicate()
+            output = stdout.decode(errors="replace")
             if stderr:
-                output += f"\nSTDERR:\n{stderr}"
+                output += f"\nSTDERR:\n{stderr.decode(errors='replace')}"
+            session["delivered"] = True
             
             return {
                 "error": None,
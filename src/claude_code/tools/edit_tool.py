@@ -2,10 +2,93 @@
 Edit tool for modifying files
 """
 
+import mmap
 import os
-from typing import Dict, Any, Optional
+import shutil
+import stat
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union
 from .base_tool import BaseTool
 
+# Files at least this large are memory-mapped instead of read into memory.
+# Windows can't replace a file that is still mapped, so it always reads.
+_MMAP_THRESHOLD = 1 << 20 if os.name != "nt" else None
+
+
+def _find_all(content: Union[bytes, mmap.mmap], needle: bytes, replace_all: bool) -> List[int]:
+    """Offsets of non-overlapping occurrences of needle (only the first unless replace_all)"""
+    if not needle:
+        # An empty needle matches before every character (as str.replace
+        # does); skip UTF-8 continuation bytes so no character is split
+        if not replace_all:
+            return [0]
+        size = len(content)
+        return [index for index in range(size + 1) if index == size or content[index] & 0xC0 != 0x80]
+    
+    positions = []
+    index = content.find(needle)
+    while index >= 0:
+        positions.append(index)
+        if not replace_all:
+            break
+        index = content.find(needle, index + len(needle))
+    return positions
+
+
+def _spliced(content: Union[bytes, mmap.mmap], positions: List[int], old_len: int,
+             replacement: bytes) -> Iterator[bytes]:
+    """Yield the content with the replacement spliced in at each position"""
+    start = 0
+    for index in positions:
+        yield content[start:index]
+        yield replacement
+        start = index + old_len
+    yield content[start:]
+
+
+def _write_atomic(file_path: str, chunks: Iterable[bytes]):
+    """
+    Replace a file's content without ever leaving it half-written
+    
+    The content goes to a temp file next to the real target (symlinks are
+    resolved, so the link itself survives) that is fsynced and then renamed
+    over it, so a crash or full disk leaves the original intact. The original
+    mode and, where permitted, owner are kept. A file with several hard links
+    is instead rewritten in place from the finished temp file so every link
+    sees the change.
+    
+    Args:
+        file_path: File to overwrite
+        chunks: New file content, written in order
+    """
+    target = os.path.realpath(file_path)
+    tmp_path = f"{target}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.writelines(chunks)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        st = os.stat(target)
+        if st.st_nlink > 1:
+            shutil.copyfile(tmp_path, target)
+            os.unlink(tmp_path)
+            return
+        
+        # Keep the original permissions (e.g. executable scripts) and owner
+        os.chmod(tmp_path, stat.S_IMODE(st.st_mode))
+        if hasattr(os, "chown"):
+            try:
+                os.chown(tmp_path, st.st_uid, st.st_gid)
+            except PermissionError:
+                pass
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
 
 class EditTool(BaseTool):
     """Tool for editing files with exact string replacements"""
@@ -60,36 +143,40 @@ class EditTool(BaseTool):
             }
         
         try:
-            # Check if file exists
-            if not os.path.exists(file_path):
-                return {
-                    "error": f"File does not exist: {file_path}",
-                    "result": None
-                }
-            
-            # Read current file content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Check if old_string exists in content
-            if old_string not in content:
-                return {
-                    "error": f"old_string not found in file: {file_path}",
-                    "result": None
-                }
+            # Work on the raw bytes: UTF-8 matches are the same at the byte
+            # level, and the rest of the file is copied through untouched
+            old_bytes = old_string.encode('utf-8')
+            new_bytes = new_string.encode('utf-8')
             
-            # Perform replacement
-            if replace_all:
-                new_content = content.replace(old_string, new_string)
-                replacements_made = content.count(old_string)
-            else:
-                # Replace only first occurrence
-                new_content = content.replace(old_string, new_string, 1)
-                replacements_made = 1
+            # A missing file surfaces as FileNotFoundError
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if _MMAP_THRESHOLD is not None and size >= _MMAP_THRESHOLD:
+                    content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    content = f.read()
             
-            # Write back to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            try:
+                # The lookup doubles as the existence check
+                positions = _find_all(content, old_bytes, replace_all)
+                if not positions and "\n" in old_string and content.find(b"\r\n") >= 0:
+                    # CRLF file: match the text the way it reads with universal newlines
+                    old_bytes = old_string.replace("\r\n", "\n").replace("\n", "\r\n").encode('utf-8')
+                    new_bytes = new_string.replace("\r\n", "\n").replace("\n", "\r\n").encode('utf-8')
+                    positions = _find_all(content, old_bytes, replace_all)
+                
+                if not positions:
+                    return {
+                        "error": f"old_string not found in file: {file_path}",
+                        "result": None
+                    }
+                
+                # Write back to file
+                _write_atomic(file_path, _spliced(content, positions, len(old_bytes), new_bytes))
+                replacements_made = len(positions)
+            finally:
+                if isinstance(content, mmap.mmap):
+                    content.close()
             
             return {
                 "error": None,
@@ -98,6 +185,11 @@ class EditTool(BaseTool):
                 "replacements_made": replacements_made
             }
             
+        except FileNotFoundError:
+            return {
+                "error": f"File does not exist: {file_path}",
+                "result": None
+            }
         except PermissionError:
             return {
                 "error": f"Permission denied: {file_path}",
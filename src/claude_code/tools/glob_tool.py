@@ -3,11 +3,23 @@ Glob tool for file pattern matching
 """
 
 import glob
+import heapq
 import os
-from typing import Dict, Any, Optional
+from operator import itemgetter
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
 from .base_tool import BaseTool
 
 
+def _with_mtimes(paths: Iterable[str]) -> Iterator[Tuple[str, float]]:
+    """Pair each path with its modification time, skipping paths we can't stat"""
+    for path in paths:
+        try:
+            yield path, os.stat(path).st_mtime
+        except OSError:
+            # Skip files we can't access
+            continue
+
+
 class GlobTool(BaseTool):
     """Tool for fast file pattern matching"""
     
@@ -25,6 +37,10 @@ class GlobTool(BaseTool):
                     "path": {
                         "type": "string",
                         "description": "The directory to search in. If not specified, the current working directory will be used. IMPORTANT: Omit this field to use the default directory. DO NOT enter \"undefined\" or \"null\" - simply omit it for the default behavior. Must be a valid directory path if provided."
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Optional maximum number of paths to return (the most recently modified ones). If not specified, all matches are returned."
                     }
                 },
                 "required": [
@@ -35,7 +51,7 @@ class GlobTool(BaseTool):
             }
         )
     
-    async def execute(self, pattern: str, path: Optional[str] = None) -> Dict[str, Any]:
+    async def execute(self, pattern: str, path: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
         """Execute glob pattern matching"""
         if not self.validate_input(pattern=pattern):
             return {
@@ -53,29 +69,25 @@ class GlobTool(BaseTool):
             else:
                 full_pattern = pattern
             
-            # Find matching files
-            matches = glob.glob(full_pattern, recursive=True)
-            
-            # Sort by modification time (newest first)
-            matches_with_time = []
-            for match in matches:
-                try:
-                    mtime = os.path.getmtime(match)
-                    matches_with_time.append((match, mtime))
-                except OSError:
-                    # Skip files we can't access
-                    continue
+            # Stat matches as the walk yields them rather than after collecting them all
+            matches_with_time = list(_with_mtimes(glob.iglob(full_pattern, recursive=True)))
+            total = len(matches_with_time)
             
-            # Sort by modification time (newest first)
-            matches_with_time.sort(key=lambda x: x[1], reverse=True)
-            sorted_matches = [match[0] for match in matches_with_time]
+            # Sort by modification time (newest first); a partial heap selection
+            # is O(n log limit) when only the newest few are wanted
+            if limit is not None and limit < total:
+                newest = heapq.nlargest(max(limit, 0), matches_with_time, key=itemgetter(1))
+            else:
+                newest = sorted(matches_with_time, key=itemgetter(1), reverse=True)
+            sorted_matches = [match for match, _ in newest]
             
             return {
                 "error": None,
                 "result": sorted_matches,
                 "pattern": pattern,
                 "search_dir": search_dir,
-                "count": len(sorted_matches)
+                "count": len(sorted_matches),
+                "truncated": len(sorted_matches) < total
             }
             
         except Exception as e:
@@ -114,6 +114,21 @@ def get_logger(name: str = None) -> logging.Logger:
     return logging.getLogger(name)
 
 
+class LazyFormat:
+    """
+    Defer building a log argument until the record is actually emitted
+    
+    Pass an instance as a ``%s`` argument; ``fn`` only runs if the logger
+    formats the message.
+    """
+    
+    def __init__(self, fn):
+        self.fn = fn
+    
+    def __str__(self):
+        return str(self.fn())
+
+
 def log_function_call(logger: logging.Logger, func_name: str, **kwargs):
     """
     Log a function call with parameters
@@ -123,8 +138,8 @@ def log_function_call(logger: logging.Logger, func_name: str, **kwargs):
         func_name: Function name
         **kwargs: Function parameters to log
     """
-    params = ", ".join([f"{k}={v}" for k, v in kwargs.items()])
-    logger.debug(f"Calling {func_name}({params})")
+    params = LazyFormat(lambda: ", ".join([f"{k}={v}" for k, v in kwargs.items()]))
+    logger.debug("Calling %s(%s)", func_name, params)
 
 
 def log_function_result(logger: logging.Logger, func_name: str, result: any, success: bool = True):
@@ -17,6 +17,7 @@ from claude_code.tools import (
     ReadTool, WriteTool, EditTool, BashTool, LSTool, GrepTool, 
     GlobTool, WebSearchTool, WebFetchTool, TodoWriteTool, TaskTool, ExitTool
 )
+from claude_code.tools import bash_tool as bash_tool_module
 
 
 class ToolTester:
@@ -166,6 +167,28 @@ class ToolTester:
         if "Modified content" not in content:
             return {'success': False, 'message': "Edit was not applied correctly"}
         
+        # Editing through a symlink must change the target and keep the link
+        if hasattr(os, 'symlink'):
+            link_file = os.path.join(self.test_dir, 'edit_link.txt')
+            os.symlink(test_file, link_file)
+            result = await tool.execute(
+                file_path=link_file,
+                old_string="More content",
+                new_string="Linked content"
+            )
+            
+            if result.get('error'):
+                return {'success': False, 'message': f"Error editing through symlink: {result['error']}"}
+            
+            if not os.path.islink(link_file):
+                return {'success': False, 'message': "Edit replaced the symlink with a regular file"}
+            
+            with open(test_file, 'r') as f:
+                content = f.read()
+            
+            if "Linked content" not in content:
+                return {'success': False, 'message': "Edit through symlink did not change the target"}
+        
         return {'success': True, 'message': "Edit tool working correctly"}
     
     async def test_bash_tool(self):
@@ -186,6 +209,36 @@ class ToolTester:
         # The bash tool might not return an error for invalid commands, just empty output
         # This is actually correct behavior for bash - it returns the command not found message in stderr
         
+        # The persistent shell keeps cd and exports, and background commands start from them
+        if bash_tool_module._BASH is not None:
+            await tool.execute(command=f"cd '{self.test_dir}' && export BASH_TOOL_TEST=kept")
+            result = await tool.execute(command="pwd; echo $BASH_TOOL_TEST")
+            if result.get('result', '').split() != [os.path.realpath(self.test_dir), 'kept']:
+                return {'success': False, 'message': f"Shell state not kept: {result}"}
+            
+            result = await tool.execute(command="pwd; echo $BASH_TOOL_TEST", run_in_background=True)
+            session_id = result.get('session_id')
+            for _ in range(50):
+                output = await tool.get_background_output(session_id)
+                if not output.get('running'):
+                    break
+                await asyncio.sleep(0.1)
+            if output.get('result', '').split() != [os.path.realpath(self.test_dir), 'kept']:
+                return {'success': False, 'message': f"Background command did not inherit shell state: {output}"}
+            await tool.shutdown()
+        
+        # Without bash every command gets a fresh shell, so state does not carry over
+        saved_bash = bash_tool_module._BASH
+        bash_tool_module._BASH = None
+        try:
+            fallback_tool = BashTool()
+            await fallback_tool.execute(command=f"cd '{self.test_dir}'")
+            result = await fallback_tool.execute(command="pwd")
+            if result.get('result', '').strip() != os.getcwd():
+                return {'success': False, 'message': f"Fallback shell kept state: {result}"}
+        finally:
+            bash_tool_module._BASH = saved_bash
+        
         return {'success': True, 'message': "Bash tool working correctly"}
     
     async def test_ls_tool(self):
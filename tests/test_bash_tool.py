@@ -0,0 +1,51 @@
+"""
+Tests for BashTool's persistent shell
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from claude_code.tools import bash_tool as bash_tool_module
+from claude_code.tools import BashTool
+
+pytestmark = pytest.mark.skipif(bash_tool_module._BASH is None, reason="needs bash")
+
+
+def test_late_background_output_does_not_leak():
+    async def run():
+        tool = BashTool()
+        try:
+            await tool.execute("(sleep 0.3; echo LATE) &")
+            await asyncio.sleep(0.5)
+            return await tool.execute("echo next")
+        finally:
+            await tool.shutdown()
+    
+    result = asyncio.run(run())
+    
+    assert result["error"] is None
+    assert result["result"] == "next\n"
+
+
+def test_cancelled_command_output_does_not_leak():
+    async def run():
+        tool = BashTool()
+        try:
+            task = asyncio.create_task(tool.execute("echo early; sleep 5; echo done"))
+            await asyncio.sleep(0.3)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return await tool.execute("echo next")
+        finally:
+            await tool.shutdown()
+    
+    result = asyncio.run(run())
+    
+    assert result["error"] is None
+    assert result["result"] == "next\n"
@@ -0,0 +1,81 @@
+"""
+Tests for ClaudeCodeSystem request handling
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from claude_code.agents.loop_agent import AgentResponse
+from claude_code.core.claude_code_system import ClaudeCodeSystem, ClaudeCodeConfig
+
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    """System whose lead agent echoes the request and records the prompts it saw"""
+    # The conversation is persisted relative to the working directory, and
+    # saves still pending at exit happen after the test restored it
+    monkeypatch.chdir(tmp_path)
+    system = ClaudeCodeSystem(ClaudeCodeConfig())
+    context_manager = system.workflow_pipeline.context_manager
+    context_manager.context_file = str(tmp_path / context_manager.context_file)
+    context_manager.messages_file = str(tmp_path / context_manager.messages_file)
+    system.prompts = []
+    
+    async def execute(request, context):
+        system.prompts.append((request, [m['content'] for m in context['messages']]))
+        await asyncio.sleep(0.01)
+        return AgentResponse(content=f"re: {request}")
+    
+    monkeypatch.setattr(system.lead_agent, "execute", execute)
+    return system
+
+
+def test_process_requests_isolates_each_request(system):
+    async def run():
+        system.workflow_pipeline.context_manager.add_message("user", "earlier")
+        return await system.process_requests(["a", "b", "c"])
+    
+    responses = asyncio.run(run())
+    
+    assert [r["response"] for r in responses] == ["re: a", "re: b", "re: c"]
+    assert sorted(system.prompts) == [
+        ("a", ["earlier", "a"]),
+        ("b", ["earlier", "b"]),
+        ("c", ["earlier", "c"]),
+    ]
+    history = system.workflow_pipeline.context_manager.get_messages()
+    assert [(m.role, m.content) for m in history] == [
+        ("user", "earlier"),
+        ("user", "a"), ("assistant", "re: a"),
+        ("user", "b"), ("assistant", "re: b"),
+        ("user", "c"), ("assistant", "re: c"),
+    ]
+
+
+def test_response_cache_reuses_answers_for_the_same_conversation(system):
+    system.config.response_cache_size = 8
+    
+    async def run():
+        first = await system.process_request("hi", include_context=False)
+        system.clear_context()
+        repeated = await system.process_request("  HI ", include_context=False)
+        follow_up = await system.process_request("hi", include_context=False)
+        return first, repeated, follow_up
+    
+    first, repeated, follow_up = asyncio.run(run())
+    
+    assert repeated == first
+    # The cached exchange is recorded, so the same words after it are new
+    assert [request for request, _ in system.prompts] == ["hi", "hi"]
+    assert system.prompts[1][1] == ["  HI ", "re: hi", "hi"]
+    history = system.workflow_pipeline.context_manager.get_messages()
+    assert [(m.role, m.content) for m in history] == [
+        ("user", "  HI "), ("assistant", "re: hi"),
+        ("user", "hi"), ("assistant", "re: hi"),
+    ]
+    assert follow_up["response"] == "re: hi"
@@ -0,0 +1,91 @@
+"""
+Tests for ContextManager persistence (JSONL message log plus snapshot)
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from claude_code.core.context_manager import ContextManager
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    # Context files are relative to the working directory; without a running
+    # event loop every change is written immediately
+    monkeypatch.chdir(tmp_path)
+
+
+def _log_lines(manager):
+    with open(manager.messages_file, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def _contents(manager):
+    return [(message.role, message.content) for message in manager.get_messages()]
+
+
+def test_messages_reload_after_append():
+    manager = ContextManager(max_messages=10)
+    manager.add_message("user", "hi")
+    manager.add_message("assistant", "hello")
+    manager.set_session_data("mode", "test")
+    
+    reloaded = ContextManager(max_messages=10)
+    
+    assert _contents(reloaded) == [("user", "hi"), ("assistant", "hello")]
+    assert reloaded.get_session_data("mode") == "test"
+    assert [line["content"] for line in _log_lines(manager)] == ["hi", "hello"]
+
+
+def test_log_is_rewritten_past_twice_max_messages():
+    manager = ContextManager(max_messages=5)
+    for i in range(10):
+        manager.add_message("user", f"m{i}")
+    assert len(_log_lines(manager)) == 10
+    
+    manager.add_message("user", "m10")
+    
+    assert [line["content"] for line in _log_lines(manager)] == ["m6", "m7", "m8", "m9", "m10"]
+    assert _contents(ContextManager(max_messages=5)) == [("user", f"m{i}") for i in range(6, 11)]
+
+
+def test_clear_context_empties_the_log():
+    manager = ContextManager(max_messages=10)
+    manager.add_message("user", "hi")
+    manager.set_session_data("mode", "test")
+    
+    manager.clear_context()
+    
+    assert _log_lines(manager) == []
+    reloaded = ContextManager(max_messages=10)
+    assert reloaded.get_messages() == []
+    assert reloaded.session_data == {}
+
+
+def test_legacy_context_file_is_migrated():
+    legacy = {
+        "messages": [
+            {"role": "user", "content": "old question", "timestamp": "2024-01-01T10:00:00", "metadata": {}},
+            {"role": "assistant", "content": "old answer", "timestamp": "2024-01-01T10:00:05", "metadata": {}},
+        ],
+        "project": None,
+        "session_data": {"mode": "legacy"},
+    }
+    with open("claude_code_context.json", "w", encoding='utf-8') as f:
+        json.dump(legacy, f)
+    
+    manager = ContextManager(max_messages=10)
+    assert _contents(manager) == [("user", "old question"), ("assistant", "old answer")]
+    assert manager.get_session_data("mode") == "legacy"
+    
+    manager.add_message("user", "new question")
+    
+    assert [line["content"] for line in _log_lines(manager)] == ["old question", "old answer", "new question"]
+    with open(manager.context_file, encoding='utf-8') as f:
+        assert "messages" not in json.load(f)
+    assert _contents(ContextManager(max_messages=10))[-1] == ("user", "new question")
@@ -0,0 +1,80 @@
+"""
+Tests for EditTool
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from claude_code.tools import edit_tool
+from claude_code.tools.edit_tool import EditTool
+
+
+def _edit(path, old_string, new_string, replace_all=False):
+    return asyncio.run(EditTool().execute(str(path), old_string, new_string, replace_all))
+
+
+def test_empty_old_string_replace_all_terminates(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"abcd")
+    
+    result = _edit(path, "", "-", replace_all=True)
+    
+    # Same as str.replace: one insertion at every offset, including the end
+    assert result["error"] is None
+    assert result["replacements_made"] == 5
+    assert path.read_bytes() == b"-a-b-c-d-"
+
+
+def test_empty_old_string_keeps_multibyte_characters(tmp_path):
+    path = tmp_path / "utf8.txt"
+    path.write_text("hé", encoding="utf-8")
+    
+    result = _edit(path, "", "|", replace_all=True)
+    
+    assert result["replacements_made"] == 3
+    assert path.read_text(encoding="utf-8") == "|h|é|"
+
+
+
+def test_lf_old_string_matches_crlf_file(tmp_path):
+    path = tmp_path / "windows.txt"
+    path.write_bytes(b"first line\r\nsecond line\r\nthird line\r\n")
+    
+    result = _edit(path, "first line\nsecond line", "one\ntwo")
+    
+    # The replacement takes the file's line endings too
+    assert result["error"] is None
+    assert path.read_bytes() == b"one\r\ntwo\r\nthird line\r\n"
+
+
+def test_crlf_retry_still_reports_missing_text(tmp_path):
+    path = tmp_path / "windows.txt"
+    path.write_bytes(b"first line\r\nsecond line\r\n")
+    
+    result = _edit(path, "first line\nthird line", "x")
+    
+    assert result["error"] == f"old_string not found in file: {path}"
+    assert path.read_bytes() == b"first line\r\nsecond line\r\n"
+
+
+@pytest.mark.skipif(edit_tool._MMAP_THRESHOLD is None, reason="files are never memory-mapped here")
+def test_large_file_is_edited_through_mmap(tmp_path):
+    path = tmp_path / "large.txt"
+    line = "x = 1  # padding padding padding padding\n"
+    body = line * (edit_tool._MMAP_THRESHOLD // len(line) + 1)
+    path.write_text("HEADER\n" + body + "FOOTER\n", encoding="utf-8")
+    mode = 0o640
+    os.chmod(path, mode)
+    
+    result = _edit(path, "FOOTER", "END")
+    
+    assert result["replacements_made"] == 1
+    assert path.read_text(encoding="utf-8") == "HEADER\n" + body + "END\n"
+    assert os.stat(path).st_mode & 0o777 == mode
+    assert os.listdir(tmp_path) == ["large.txt"]
@@ -0,0 +1,52 @@
+"""
+Tests for GlobTool
+"""
+
+import asyncio
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from claude_code.tools.glob_tool import GlobTool
+
+
+def _make_files(directory, count):
+    """Create count files, each modified later than the one before"""
+    paths = []
+    for i in range(count):
+        path = directory / f"file_{i}.py"
+        path.write_text(f"# {i}\n")
+        os.utime(path, (1_000_000 + i, 1_000_000 + i))
+        paths.append(str(path))
+    return paths
+
+
+def test_limit_returns_the_newest_matches(tmp_path):
+    paths = _make_files(tmp_path, 10)
+    
+    result = asyncio.run(GlobTool().execute("*.py", path=str(tmp_path), limit=3))
+    
+    assert result["error"] is None
+    assert result["result"] == [paths[9], paths[8], paths[7]]
+    assert result["count"] == 3
+    assert result["truncated"] is True
+
+
+def test_without_limit_all_matches_are_returned_newest_first(tmp_path):
+    paths = _make_files(tmp_path, 5)
+    
+    result = asyncio.run(GlobTool().execute("*.py", path=str(tmp_path)))
+    
+    assert result["result"] == paths[::-1]
+    assert result["truncated"] is False
+
+
+def test_limit_above_match_count_is_not_truncated(tmp_path):
+    paths = _make_files(tmp_path, 4)
+    
+    result = asyncio.run(GlobTool().execute("*.py", path=str(tmp_path), limit=10))
+    
+    assert result["result"] == paths[::-1]
+    assert result["truncated"] is False
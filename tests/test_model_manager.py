@@ -0,0 +1,109 @@
+"""
+Tests for ModelManager provider selection
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from claude_code.models import model_manager as model_manager_module
+from claude_code.models.model_manager import BaseModelProvider, ModelManager
+
+
+class FakeProvider(BaseModelProvider):
+    """Provider that answers with its name after a delay, or always fails"""
+    
+    def __init__(self, name: str, available: bool = True, fail: bool = False, delay: float = 0.0):
+        super().__init__(name)
+        self.available = available
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = False
+    
+    async def check_availability(self) -> bool:
+        return self.available
+    
+    async def generate_response(self, messages, tools=None, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        return f"from {self.name}"
+    
+    async def shutdown(self):
+        pass
+
+
+def _manager(*providers: FakeProvider) -> ModelManager:
+    manager = ModelManager()
+    for index, provider in enumerate(providers):
+        manager.register_provider(provider, is_default=index == 0)
+    manager.set_fallback_providers([provider.name for provider in providers])
+    asyncio.run(manager.initialize_providers())
+    return manager
+
+
+def test_available_providers_keep_registration_order():
+    names = ["zeta", "alpha", "mid", "beta", "omega", "gamma", "kappa", "delta"]
+    manager = _manager(*(FakeProvider(name, available=name != "mid") for name in names))
+    
+    assert manager.get_available_providers() == ["zeta", "alpha", "beta", "omega", "gamma", "kappa", "delta"]
+
+
+def test_failing_provider_is_skipped_until_the_cooldown_ends(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(model_manager_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    primary = FakeProvider("primary", fail=True)
+    backup = FakeProvider("backup")
+    manager = _manager(primary, backup)
+    
+    async def ask():
+        return await manager.generate_response([{"role": "user", "content": "hi"}])
+    
+    # Every failure still falls back; the third trips the breaker
+    for _ in range(model_manager_module.FAILURE_THRESHOLD):
+        assert asyncio.run(ask()) == "from backup"
+    assert primary.calls == model_manager_module.FAILURE_THRESHOLD
+    
+    clock.now += model_manager_module.FAILURE_COOLDOWN - 1
+    assert asyncio.run(ask()) == "from backup"
+    assert primary.calls == model_manager_module.FAILURE_THRESHOLD
+    
+    clock.now += 1
+    primary.fail = False
+    assert asyncio.run(ask()) == "from primary"
+    assert primary.calls == model_manager_module.FAILURE_THRESHOLD + 1
+
+
+def test_hedged_request_returns_the_fastest_answer():
+    slow = FakeProvider("slow", delay=1.0)
+    fast = FakeProvider("fast", delay=0.01)
+    manager = _manager(slow, fast)
+    
+    async def ask():
+        response = await manager.generate_response([{"role": "user", "content": "hi"}], hedge=True)
+        await asyncio.sleep(0)  # let the losing request see its cancellation
+        return response
+    
+    assert asyncio.run(ask()) == "from fast"
+    assert slow.calls == fast.calls == 1
+    assert slow.cancelled
+
+
+def test_hedged_request_waits_for_the_other_provider_when_one_fails():
+    failing = FakeProvider("failing", fail=True)
+    slower = FakeProvider("slower", delay=0.05)
+    manager = _manager(failing, slower)
+    
+    response = asyncio.run(manager.generate_response([{"role": "user", "content": "hi"}], hedge=True))
+    
+    assert response == "from slower"
+    assert failing.calls == slower.calls == 1
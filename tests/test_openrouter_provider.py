@@ -0,0 +1,77 @@
+"""
+Tests for OpenRouterProvider against a fake OpenAI client
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from claude_code.models.openrouter_provider import OpenRouterProvider
+
+
+class FakeClient:
+    """Stands in for AsyncOpenAI, answering every completion with a fixed reply"""
+    
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+    
+    async def _create(self, **params):
+        self.requests.append(params)
+        await asyncio.sleep(self.delay)
+        message = SimpleNamespace(content=f"reply {len(self.requests)}", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+def _provider(client: FakeClient) -> OpenRouterProvider:
+    provider = OpenRouterProvider(api_key="test-key")
+    provider._clients = [client]
+    provider.client = client
+    return provider
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_temperature_none_is_not_cached():
+    client = FakeClient()
+    provider = _provider(client)
+    
+    async def run():
+        return [await provider.generate_response(MESSAGES, temperature=None) for _ in range(2)]
+    
+    assert asyncio.run(run()) == ["reply 1", "reply 2"]
+    assert len(client.requests) == 2
+
+
+def test_identical_deterministic_requests_share_one_call():
+    client = FakeClient(delay=0.05)
+    provider = _provider(client)
+    
+    async def run():
+        return await asyncio.gather(*(
+            provider.generate_response(MESSAGES, temperature=0) for _ in range(5)
+        ))
+    
+    assert asyncio.run(run()) == ["reply 1"] * 5
+    assert len(client.requests) == 1
+    assert provider._inflight == {}
+
+
+def test_cancelling_one_caller_keeps_the_shared_call():
+    client = FakeClient(delay=0.05)
+    provider = _provider(client)
+    
+    async def run():
+        first = asyncio.ensure_future(provider.generate_response(MESSAGES, temperature=0))
+        second = asyncio.ensure_future(provider.generate_response(MESSAGES, temperature=0))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+    
+    assert asyncio.run(run()) == "reply 1"
+    assert len(client.requests) == 1
@@ -0,0 +1,64 @@
+"""
+Tests for ToolExecutor
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from claude_code.core.output_parser import ToolAction
+from claude_code.core.tool_executor import ToolExecutor
+from claude_code.tools import ReadTool
+
+
+def _run(executor, tool_name, **parameters):
+    return asyncio.run(executor._execute_single_tool(ToolAction(tool_name, parameters), None))
+
+
+def test_tool_added_to_tools_directly_runs(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello\n")
+    executor = ToolExecutor()
+    executor.tools['MyRead'] = ReadTool()
+    
+    result = _run(executor, 'MyRead', file_path=str(path))
+    
+    assert result.success, result.error
+    assert "hello" in str(result.result)
+
+
+def test_unknown_tool_is_reported():
+    result = _run(ToolExecutor(), 'Missing')
+    
+    assert not result.success
+    assert result.error == "Tool 'Missing' not found"
+
+
+def test_large_bash_output_is_offloaded_and_removed_on_shutdown():
+    executor = ToolExecutor()
+    output = "line\n" * 5000
+    
+    summary = executor._display_result('Bash', {'error': None, 'result': output})
+    
+    path = summary.split("[offloaded to ", 1)[1].split("]", 1)[0]
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == output
+    scratch_dir = os.path.dirname(path)
+    assert not scratch_dir.startswith(os.getcwd())
+    
+    asyncio.run(executor.shutdown())
+    
+    assert not os.path.exists(scratch_dir)
+
+
+def test_given_scratch_dir_is_kept_on_shutdown(tmp_path):
+    executor = ToolExecutor(scratch_dir=str(tmp_path / "scratch"))
+    matches = [f"/project/src/module_{i}.py" for i in range(1000)]
+    
+    summary = executor._display_result('Glob', {'error': None, 'result': matches})
+    
+    assert summary.startswith("✓ Glob matched 1000 files")
+    asyncio.run(executor.shutdown())
+    assert len(list((tmp_path / "scratch").iterdir())) == 1